@@ -1,30 +1,49 @@
 import asyncio
 import random
 import json
-import aiohttp  # Use aiohttp for async HTTP requests
 import logging
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, AsyncIterator, Awaitable, Callable
 from enum import Enum
 from datetime import datetime
 import numpy as np
-from config import TOGETHER_API_KEY
 from textblob import TextBlob
 
-# Import the save_conversation function
-from database import save_conversation
+# Shared, pooled client for the Together API
+from llm_client import llm_client, LLMError
+from config import TOGETHER_MODEL
+from response_cache import response_cache, make_cache_key
+from memory import ConversationMemory
+from vad import VoiceActivityDetector
+
+# Conversation turns are persisted off the response path
+from database import save_conversation_in_background
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
 
 class VoiceInputAgent:
-    def __init__(self):
-        pass  # No initialization needed as we'll use the browser's Web Speech API
+    def __init__(
+        self,
+        transcribe: Optional[Callable[[bytes, int], Awaitable[str]]] = None,
+        vad: Optional[VoiceActivityDetector] = None,
+    ):
+        # Without a transcriber, recognition happens in the browser (Web Speech API)
+        # and the client sends text. With one, the client sends 16-bit mono PCM:
+        # only the utterances found by the VAD are sent to speech-to-text.
+        self.transcribe = transcribe
+        self.vad = vad or VoiceActivityDetector()
 
     async def process(self, audio_stream: bytes) -> Optional[str]:
-        # The actual speech recognition happens in the browser.
-        # This method decodes the audio stream to text.
-        return audio_stream.decode('utf-8')
+        if self.transcribe is None:
+            # The actual speech recognition happened in the browser.
+            return audio_stream.decode('utf-8')
+        texts = []
+        for utterance in self.vad.feed(audio_stream):
+            text = await self.transcribe(utterance, self.vad.sample_rate)
+            if text:
+                texts.append(text)
+        return " ".join(texts) or None
 
 
 class ConversationMode(Enum):
@@ -36,10 +55,36 @@ class ConversationMode(Enum):
     SALES_COACH = "sales_coach"
 
 
+# Seconds a cached coach response stays valid, per conversation mode.
+# Scripted drills repeat verbatim and can be cached longer than analysis modes.
+RESPONSE_CACHE_TTLS = {
+    ConversationMode.PITCH_PRACTICE: 6 * 3600,
+    ConversationMode.INVESTOR_SIMULATION: 6 * 3600,
+    ConversationMode.PROBLEM_SOLVING: 3600,
+    ConversationMode.MARKET_ANALYSIS: 900,
+    ConversationMode.FINANCIAL_PLANNING: 900,
+    ConversationMode.SALES_COACH: 6 * 3600,
+}
+
+# Token budget for the rolling window of recent turns sent to the model, per mode.
+MEMORY_TOKEN_BUDGETS = {
+    ConversationMode.PITCH_PRACTICE: 600,
+    ConversationMode.INVESTOR_SIMULATION: 1200,
+    ConversationMode.PROBLEM_SOLVING: 1000,
+    ConversationMode.MARKET_ANALYSIS: 800,
+    ConversationMode.FINANCIAL_PLANNING: 800,
+    ConversationMode.SALES_COACH: 1000,
+}
+
+
 class ConversationSimulatorAgent:
-    def __init__(self):
-        self.conversation_history = []
+    def __init__(self, user_id: str = "default_user"):
+        # Conversation logs are saved under this id.
+        self.user_id = user_id
         self.mode = ConversationMode.SALES_COACH
+        self.memory = ConversationMemory(token_budget=MEMORY_TOKEN_BUDGETS[self.mode])
+        self.model = TOGETHER_MODEL
+        self.temperature = 0.7
         self.analytics = {
             "sales_skills": {
                 "pitch_clarity": 0,
@@ -86,6 +131,12 @@ class ConversationSimulatorAgent:
             ConversationMode.SALES_COACH: self.system_prompt,
         }
         self.system_prompt = mode_prompts[new_mode]
+        self.memory.set_token_budget(MEMORY_TOKEN_BUDGETS[new_mode])
+
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """Recent turns inside the memory window."""
+        return self.memory.history
 
     async def process_and_speak(self, transcription: str) -> tuple[str, str]:
         """
@@ -93,63 +144,134 @@ class ConversationSimulatorAgent:
         Returns a tuple: (final_response_text, audio_response).
         Currently, audio_response is an empty string.
         """
-        # Append the user's message to conversation history.
-        self.conversation_history.append({
-            "role": "user",
-            "content": transcription
-        })
+        # Append the user's message to conversation memory.
+        self.memory.append("user", transcription)
 
         # Generate the response using the LLM.
         response = await self._generate_llm_response()
 
-        # Append the assistant's response to conversation history.
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": response
-        })
+        # Append the assistant's response and fold older turns into the summary.
+        self.memory.append("assistant", response)
+        self.memory.maybe_refresh_summary(self._summarize)
 
-        # Save conversation to the database.
-        await save_conversation(user_id="default_user", transcript=transcription, analysis=response)
+        # Save conversation to the database in the background.
+        save_conversation_in_background(user_id=self.user_id, transcript=transcription, analysis=response)
 
         # Return a tuple (response, audio_response).
         return response, ""
 
+    async def stream_and_speak(self, transcription: str) -> AsyncIterator[str]:
+        """
+        Streaming variant of process_and_speak.
+        Yields response text deltas as the LLM produces them, then records the
+        full response in the conversation history and the database.
+        """
+        self.memory.append("user", transcription)
+
+        chunks = []
+        async for delta in self._stream_llm_response():
+            chunks.append(delta)
+            yield delta
+        response = "".join(chunks).strip()
+
+        self.memory.append("assistant", response)
+        self.memory.maybe_refresh_summary(self._summarize)
+
+        save_conversation_in_background(user_id=self.user_id, transcript=transcription, analysis=response)
+
+    def _build_messages(self) -> List[Dict[str, str]]:
+        """Builds the messages payload: system prompt, running summary and recent turns."""
+        return self.memory.build_messages(self.system_prompt)
+
+    def _cache_key(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        # Only context-free turns (openers) are cacheable; later turns depend on history.
+        if self.memory.has_context:
+            return None
+        return make_cache_key(self.model, self.system_prompt, messages[-1]["content"], self.temperature)
+
+    async def _summarize(self, previous_summary: str, turns: List[Dict[str, str]]) -> str:
+        """Folds evicted turns into the running conversation summary."""
+        transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+        prompt = (
+            "Update this summary of a sales coaching conversation with the new turns. "
+            "Keep key facts about the product, objections raised and feedback given. "
+            "Answer with the summary only, in under 120 words.\n\n"
+            f"Current summary: {previous_summary or '(none)'}\n\nNew turns:\n{transcript}"
+        )
+        return await llm_client.chat_completion(
+            [{"role": "user", "content": prompt}],
+            model=self.model,
+            temperature=0.2,
+            max_tokens=200
+        )
+
+    def close(self):
+        self.memory.close()
+
+    async def _stream_llm_response(self) -> AsyncIterator[str]:
+        """Streams a response from Together AI API, falling back to an error message."""
+        received_any = False
+        try:
+            messages = self._build_messages()
+            cache_key = self._cache_key(messages)
+            cached = await response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                logging.info("Coach response served from cache")
+                yield cached
+                return
+
+            logging.info(f"Streaming messages to LLM: {messages}")
+            chunks = []
+            async for delta in llm_client.stream_chat_completion(
+                messages,
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=150
+            ):
+                received_any = True
+                chunks.append(delta)
+                yield delta
+            final_answer = "".join(chunks).strip()
+            if final_answer and cache_key:
+                await response_cache.set(cache_key, final_answer, ttl=RESPONSE_CACHE_TTLS.get(self.mode))
+        except LLMError as e:
+            logging.error(f"LLM Error: {e.status} - {e.text}")
+            if not received_any:
+                yield "I'm sorry, I encountered an error. Could you please try again?"
+        except Exception as e:
+            logging.error(f"Exception in _stream_llm_response: {str(e)}")
+            if not received_any:
+                yield "An error occurred while processing your request."
+
     async def _generate_llm_response(self) -> str:
         """Generates response using Together AI API."""
         try:
-            last_user_input = self.conversation_history[-1]["content"]
-
             # Prepare the messages payload.
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": last_user_input}
-            ]
+            messages = self._build_messages()
+
+            # Identical openers in the same mode are answered from the cache.
+            cache_key = self._cache_key(messages)
+            cached = await response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                logging.info("Coach response served from cache")
+                return cached
             
             logging.info(f"Sending messages to LLM: {messages}")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    "https://api.together.xyz/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {TOGETHER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "mistralai/Mixtral-8x7B-Instruct-v0.1",
-                        "messages": messages,
-                        "temperature": 0.7,
-                        "max_tokens": 150
-                    }
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        final_answer = data["choices"][0]["message"]["content"].strip()
-                        logging.info(f"LLM Response: {final_answer}")
-                        return final_answer
-                    else:
-                        error_text = await response.text()
-                        logging.error(f"LLM Error: {response.status} - {error_text}")
-                        return "I'm sorry, I encountered an error. Could you please try again?"
+            try:
+                final_answer = await llm_client.chat_completion(
+                    messages,
+                    model=self.model,
+                    temperature=self.temperature,
+                    max_tokens=150
+                )
+                logging.info(f"LLM Response: {final_answer}")
+                if cache_key:
+                    await response_cache.set(cache_key, final_answer, ttl=RESPONSE_CACHE_TTLS.get(self.mode))
+                return final_answer
+            except LLMError as e:
+                logging.error(f"LLM Error: {e.status} - {e.text}")
+                return "I'm sorry, I encountered an error. Could you please try again?"
         except Exception as e:
             logging.error(f"Exception in _generate_llm_response: {str(e)}")
             return "An error occurred while processing your request."
@@ -173,28 +295,17 @@ class FeedbackAgent:
             elif "strategy" in last_message.lower():
                 return "Focusing on your target market is key. Consider highlighting your competitive advantages."
 
-            async with aiohttp.ClientSession() as session:
-                prompt = f"Provide concise feedback for the following conversation: {json.dumps(conversation_history[-2:])}"
-                async with session.post(
-                    "https://api.together.xyz/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {TOGETHER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "mistralai/Mixtral-8x7B-Instruct-v0.1",
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.7,
-                        "max_tokens": 50
-                    }
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        feedback = data["choices"][0]["message"]["content"].strip()
-                        return f"Feedback: {feedback}"
-                    else:
-                        logging.error(f"Feedback LLM Error: {response.status} - {await response.text()}")
-                        return "Feedback: Please keep your points clear and concise."
+            prompt = f"Provide concise feedback for the following conversation: {json.dumps(conversation_history[-2:])}"
+            try:
+                feedback = await llm_client.chat_completion(
+                    [{"role": "user", "content": prompt}],
+                    temperature=0.7,
+                    max_tokens=50
+                )
+                return f"Feedback: {feedback}"
+            except LLMError as e:
+                logging.error(f"Feedback LLM Error: {e.status} - {e.text}")
+                return "Feedback: Please keep your points clear and concise."
         except Exception as e:
             logging.error(f"Feedback generation error: {str(e)}")
             return "Feedback: Please ensure your communication is clear."
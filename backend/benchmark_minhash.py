@@ -0,0 +1,65 @@
+import random
+import time
+
+from minhash import MinHashIndex
+from config import SEO_SIMILARITY_THRESHOLD, SEO_SIMILARITY_INDEX_SIZE
+
+WORDS = (
+    "launch sale product team customers coffee summer new free shipping today "
+    "discover our latest collection limited offer join community event webinar "
+    "growth startup marketing tips brand story weekend deal premium quality"
+).split()
+EMOJIS = ["🔥", "🚀", "✨", "🎉", "👉"]
+
+
+def draft(rng, words=40):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def variant(rng, text):
+    # One word swapped, or an emoji added, like a re-submitted draft
+    words = text.split()
+    if rng.random() < 0.5:
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    else:
+        words.append(rng.choice(EMOJIS))
+    return " ".join(words)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def benchmark(stored=1000, queries=1000, seed=7):
+    rng = random.Random(seed)
+    index = MinHashIndex(maxsize=SEO_SIMILARITY_INDEX_SIZE)
+    originals = [draft(rng) for _ in range(stored)]
+    started = time.perf_counter()
+    for i, text in enumerate(originals):
+        index.add(i, text, {"seo_content": text})
+    add_seconds = time.perf_counter() - started
+
+    def run(texts):
+        hits, latencies = 0, []
+        for text in texts:
+            started = time.perf_counter()
+            if index.query(text, SEO_SIMILARITY_THRESHOLD) is not None:
+                hits += 1
+            latencies.append(time.perf_counter() - started)
+        return hits / len(texts), latencies
+
+    near_rate, near_latencies = run([variant(rng, rng.choice(originals)) for _ in range(queries)])
+    unrelated_rate, unrelated_latencies = run([draft(rng) for _ in range(queries)])
+    latencies = near_latencies + unrelated_latencies
+
+    print(f"Index: {len(index)} drafts, threshold {SEO_SIMILARITY_THRESHOLD}")
+    print(f"  add:                 {add_seconds / stored * 1000:.3f}ms per draft")
+    print(f"  near-duplicate hits: {near_rate:.1%}")
+    print(f"  unrelated hits:      {unrelated_rate:.1%} (false positives)")
+    print(f"  lookup p50:          {percentile(latencies, 0.5) * 1000:.3f}ms")
+    print(f"  lookup p95:          {percentile(latencies, 0.95) * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,63 @@
+import sys
+import time
+import wave
+
+import numpy as np
+
+from vad import VoiceActivityDetector, VAD_HANGOVER_MS
+
+# Size of each simulated WebSocket frame (100 ms at 16 kHz, 16-bit)
+CHUNK_BYTES = 3200
+
+
+def load_wav(path):
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        rate = f.getframerate()
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+        if f.getnchannels() > 1:
+            samples = samples.reshape(-1, f.getnchannels()).mean(axis=1).astype(np.int16)
+    return samples.tobytes(), rate
+
+
+def synthetic_sample(rate=16000):
+    # Three "utterances" of voiced tone bursts separated by low-level noise.
+    rng = np.random.default_rng(0)
+    parts = []
+    for seconds in (1.5, 2.0, 0.8):
+        parts.append(rng.normal(0, 60, int(rate * 1.2)))
+        t = np.arange(int(rate * seconds)) / rate
+        parts.append(6000 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t)))
+    parts.append(rng.normal(0, 60, int(rate * 1.5)))
+    return np.concatenate(parts).astype(np.int16).tobytes(), rate
+
+
+def benchmark(name, pcm, rate):
+    vad = VoiceActivityDetector(sample_rate=rate)
+    started = time.perf_counter()
+    utterances = []
+    for offset in range(0, len(pcm), CHUNK_BYTES):
+        utterances.extend(vad.feed(pcm[offset:offset + CHUNK_BYTES]))
+    tail = vad.flush()
+    if tail:
+        utterances.append(tail)
+    elapsed = time.perf_counter() - started
+
+    stats = vad.stats()
+    audio_seconds = len(pcm) / 2 / rate
+    print(f"{name}:")
+    print(f"  audio:            {audio_seconds:.2f}s")
+    print(f"  utterances:       {len(utterances)} (dropped {stats['dropped']})")
+    print(f"  sent to STT:      {stats['seconds_out']:.2f}s ({stats['trimmed_ratio']:.0%} trimmed)")
+    print(f"  processing time:  {elapsed * 1000:.1f}ms ({audio_seconds / elapsed:.0f}x realtime)")
+    print(f"  end-of-utterance: {VAD_HANGOVER_MS}ms hangover")
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:]
+    if not paths:
+        print("No WAV files given; using a synthetic sample.")
+        benchmark("synthetic", *synthetic_sample())
+    for path in paths:
+        benchmark(path, *load_wav(path))
@@ -12,4 +12,68 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 TOGETHER_API_KEY = os.getenv('TOGETHER_API_KEY') 
 ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
 
+# Together chat-completions endpoint and model used by the agents
+TOGETHER_API_URL = os.getenv('TOGETHER_API_URL', "https://api.together.xyz/v1/chat/completions")
+TOGETHER_MODEL = os.getenv('TOGETHER_MODEL', "mistralai/Mixtral-8x7B-Instruct-v0.1")
+
+# Shared LLM HTTP client (connection pool and timeouts, in seconds)
+LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', 32))
+LLM_KEEPALIVE_TIMEOUT = float(os.getenv('LLM_KEEPALIVE_TIMEOUT', 60))
+LLM_DNS_CACHE_TTL = int(os.getenv('LLM_DNS_CACHE_TTL', 300))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', 5))
+LLM_READ_TIMEOUT = float(os.getenv('LLM_READ_TIMEOUT', 30))
+
+# Coach response cache (TTL in seconds; empty path disables the on-disk tier)
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 2048))
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 3600))
+RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', '')
+RESPONSE_CACHE_DISK_SIZE = int(os.getenv('RESPONSE_CACHE_DISK_SIZE', 20000))
+
+# Write-behind buffer for conversation logs
+LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', 200))
+LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', 2))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+
+# Authenticated user lookup cache (TTL in seconds)
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 4096))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 60))
+
+# bcrypt thread pool size and maximum callers waiting for a worker
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', 4))
+HASH_MAX_PENDING = int(os.getenv('HASH_MAX_PENDING', 256))
+# Retry-After (seconds) sent with 503 when the hashing queue is full
+HASH_RETRY_AFTER = int(os.getenv('HASH_RETRY_AFTER', 1))
+
+# Verified JWT cache (entries expire at the token's exp)
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+
+# SEO optimization result cache (TTL in seconds) and batch concurrency
+SEO_CACHE_SIZE = int(os.getenv('SEO_CACHE_SIZE', 1024))
+SEO_CACHE_TTL = float(os.getenv('SEO_CACHE_TTL', 24 * 3600))
+SEO_BATCH_CONCURRENCY = int(os.getenv('SEO_BATCH_CONCURRENCY', 5))
+SEO_BATCH_MAX_ITEMS = int(os.getenv('SEO_BATCH_MAX_ITEMS', 50))
+# Near-duplicate drafts at or above this estimated similarity reuse a stored result
+SEO_SIMILARITY_THRESHOLD = float(os.getenv('SEO_SIMILARITY_THRESHOLD', 0.85))
+SEO_SIMILARITY_INDEX_SIZE = int(os.getenv('SEO_SIMILARITY_INDEX_SIZE', 2048))
+
+# Per-stage timeouts for the social post pipeline (seconds)
+POST_SEO_TIMEOUT = float(os.getenv('POST_SEO_TIMEOUT', 30))
+POST_IMAGE_TIMEOUT = float(os.getenv('POST_IMAGE_TIMEOUT', 5))
+
+# Background post jobs: worker count, idle poll interval and lease (seconds)
+POST_JOB_WORKERS = int(os.getenv('POST_JOB_WORKERS', 4))
+POST_JOB_POLL_INTERVAL = float(os.getenv('POST_JOB_POLL_INTERVAL', 2))
+POST_JOB_LEASE = float(os.getenv('POST_JOB_LEASE', 120))
+POST_JOB_MAX_ATTEMPTS = int(os.getenv('POST_JOB_MAX_ATTEMPTS', 3))
+# Seconds running post jobs get to finish on shutdown before they are cancelled
+POST_JOB_SHUTDOWN_GRACE = float(os.getenv('POST_JOB_SHUTDOWN_GRACE', 30))
+
+# Scheduled publishing: parallel posts, look-ahead window, DB re-read interval
+# and claim lease (seconds), and rows read per refill
+SCHEDULER_CONCURRENCY = int(os.getenv('SCHEDULER_CONCURRENCY', 8))
+SCHEDULER_HORIZON = float(os.getenv('SCHEDULER_HORIZON', 300))
+SCHEDULER_REFILL_INTERVAL = float(os.getenv('SCHEDULER_REFILL_INTERVAL', 30))
+SCHEDULER_LEASE = float(os.getenv('SCHEDULER_LEASE', 120))
+SCHEDULER_BATCH_SIZE = int(os.getenv('SCHEDULER_BATCH_SIZE', 500))
+
 # No API keys needed as we're using Web Speech API
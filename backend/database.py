@@ -1,13 +1,20 @@
 # database.py
 import os
+import asyncio
+import base64
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select
+from sqlalchemy import select, insert, tuple_
 from ssl import create_default_context
 
-from config import DATABASE_URL
+from config import DATABASE_URL, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL, LOG_QUEUE_SIZE
 from base import Base  # Import Base from base.py
-from models import ConversationLog
+from models import ConversationLog, PostJob, ScheduledPost
 
 # Setup SSL context if needed
 ssl_context = create_default_context()
@@ -25,6 +32,10 @@ async def init_db():
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # create_all skips indexes on tables that already exist
+        for model in (ConversationLog, PostJob, ScheduledPost):
+            for index in model.__table__.indexes:
+                await conn.run_sync(lambda sync_conn, index=index: index.create(sync_conn, checkfirst=True))
 
 
 async def save_conversation(user_id: str, transcript: str, analysis: str = None):
@@ -43,6 +54,116 @@ async def save_conversation(user_id: str, transcript: str, analysis: str = None)
 
 
 
+class ConversationLogBuffer:
+    """
+    Write-behind buffer for ConversationLog rows.
+
+    Rows from every connection are queued in memory and flushed as one
+    multi-row INSERT when `batch_size` rows are waiting or `flush_interval`
+    seconds have passed, whichever comes first. The queue holds at most
+    `max_queue` rows; when full, the oldest row is dropped and counted in
+    `dropped`. Pending rows are drained on stop().
+    """
+
+    def __init__(
+        self,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        max_queue: int = LOG_QUEUE_SIZE,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: deque = deque(maxlen=max_queue)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.dropped = 0
+        self.flushed = 0
+        self.failed_flushes = 0
+
+    def add(self, user_id: str, transcript: str, analysis: str = None):
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+            logging.warning("Conversation log buffer full; dropping oldest row")
+        self._queue.append({
+            "user_id": user_id,
+            "transcript": transcript,
+            "analysis": analysis,
+            "created_at": datetime.utcnow()
+        })
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the flush loop and drains every pending row."""
+        if self._task is not None:
+            # Let the loop finish any flush in progress rather than cancelling
+            # it, so rows already taken off the queue are not lost.
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        while self._queue:
+            if not await self.flush():
+                break
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._queue and not self._stopping:
+                if not await self.flush() or len(self._queue) < self.batch_size:
+                    break
+
+    async def flush(self) -> bool:
+        """Writes up to batch_size queued rows in a single INSERT. Returns False on failure."""
+        rows = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        if not rows:
+            return True
+        try:
+            async with async_session() as session:
+                await session.execute(insert(ConversationLog).values(rows))
+                await session.commit()
+        except Exception as e:
+            self.failed_flushes += 1
+            logging.error(f"Conversation log flush of {len(rows)} rows failed: {str(e)}")
+            # Put the rows back for the next attempt, as far as the queue bound allows.
+            room = self._queue.maxlen - len(self._queue)
+            self.dropped += max(0, len(rows) - room)
+            self._queue.extendleft(reversed(rows[:room]))
+            return False
+        self.flushed += len(rows)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._queue),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes
+        }
+
+
+# Shared buffer for conversation logs, started and drained by the app lifecycle.
+conversation_log_buffer = ConversationLogBuffer()
+
+
+def save_conversation_in_background(user_id: str, transcript: str, analysis: str = None):
+    """
+    Queue a conversation log row on the write-behind buffer, keeping the
+    write off the caller's critical path.
+    """
+    conversation_log_buffer.add(user_id, transcript, analysis)
+
+
 async def get_conversation_logs(user_id: str) -> list:
     """
     Retrieve conversation logs for a specific user.
@@ -53,6 +174,115 @@ async def get_conversation_logs(user_id: str) -> list:
         )
         return result.scalars().all()
 
+def encode_cursor(created_at: datetime, log_id: int) -> str:
+    """Opaque cursor for the position after (created_at, id)."""
+    raw = json.dumps([created_at.isoformat(), log_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        created_at, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(log_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+async def get_conversation_logs_page(
+    user_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    session: Optional[AsyncSession] = None,
+) -> Tuple[List[ConversationLog], Optional[str]]:
+    """
+    Retrieve one page of a user's conversation logs, newest first.
+    Uses keyset pagination on (created_at, id) so each page is an index range
+    scan on ix_conversation_logs_user_created_id regardless of depth.
+    Returns the rows and a cursor for the next page (None on the last page).
+    """
+    query = (
+        select(ConversationLog)
+        .filter(ConversationLog.user_id == user_id)
+        .order_by(ConversationLog.created_at.desc(), ConversationLog.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, log_id = decode_cursor(cursor)
+        query = query.filter(tuple_(ConversationLog.created_at, ConversationLog.id) < tuple_(created_at, log_id))
+
+    if session is None:
+        async with async_session() as session:
+            rows = (await session.execute(query)).scalars().all()
+    else:
+        rows = (await session.execute(query)).scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+async def get_scheduled_posts_page(
+    user_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    session: Optional[AsyncSession] = None,
+) -> Tuple[List[ScheduledPost], Optional[str]]:
+    """
+    Retrieve one page of a user's scheduled posts, soonest first, using
+    keyset pagination on (due_at, id) over ix_scheduled_posts_user_due_id.
+    Returns the rows and a cursor for the next page (None on the last page).
+    """
+    query = (
+        select(ScheduledPost)
+        .filter(ScheduledPost.user_id == user_id)
+        .order_by(ScheduledPost.due_at, ScheduledPost.id)
+        .limit(limit + 1)
+    )
+    if cursor:
+        due_at, post_id = decode_cursor(cursor)
+        query = query.filter(tuple_(ScheduledPost.due_at, ScheduledPost.id) > tuple_(due_at, post_id))
+
+    if session is None:
+        async with async_session() as session:
+            rows = (await session.execute(query)).scalars().all()
+    else:
+        rows = (await session.execute(query)).scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].due_at, rows[-1].id)
+    return rows, next_cursor
+
+async def stream_conversation_logs(
+    user_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[ConversationLog]:
+    """
+    Stream conversation logs, oldest first, optionally filtered by user and
+    [start, end) date range. Rows come from a server-side cursor in batches
+    of `batch_size`, so memory stays constant regardless of the result size.
+    """
+    query = select(ConversationLog).order_by(ConversationLog.created_at, ConversationLog.id)
+    if user_id is not None:
+        query = query.filter(ConversationLog.user_id == user_id)
+    if start is not None:
+        query = query.filter(ConversationLog.created_at >= start)
+    if end is not None:
+        query = query.filter(ConversationLog.created_at < end)
+    query = query.execution_options(yield_per=batch_size)
+
+    async with async_session() as session:
+        result = await session.stream(query)
+        async for conv_log in result.scalars():
+            yield conv_log
+            # Release rows already sent so the identity map does not grow.
+            session.expunge(conv_log)
+
 async def get_db():
     """
     Dependency generator for an async database session.
@@ -0,0 +1,63 @@
+# exporters.py
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator
+
+from models import ConversationLog
+
+EXPORT_FIELDS = ["id", "user_id", "transcript", "analysis", "created_at"]
+
+# Approximate bytes to accumulate before handing a chunk to the response.
+CHUNK_SIZE = 64 * 1024
+
+
+def _row(conv_log: ConversationLog) -> dict:
+    return {
+        "id": conv_log.id,
+        "user_id": conv_log.user_id,
+        "transcript": conv_log.transcript,
+        "analysis": conv_log.analysis,
+        "created_at": conv_log.created_at.isoformat() if conv_log.created_at else None
+    }
+
+
+async def to_ndjson(rows: AsyncIterator[ConversationLog]) -> AsyncIterator[bytes]:
+    """Encode rows as newline-delimited JSON, yielding ~CHUNK_SIZE byte chunks."""
+    buffer = []
+    size = 0
+    async for conv_log in rows:
+        line = json.dumps(_row(conv_log), ensure_ascii=False) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+async def to_csv(rows: AsyncIterator[ConversationLog]) -> AsyncIterator[bytes]:
+    """Encode rows as CSV with a header line, yielding ~CHUNK_SIZE byte chunks."""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    async for conv_log in rows:
+        writer.writerow(_row(conv_log))
+        if out.tell() >= CHUNK_SIZE:
+            yield out.getvalue().encode("utf-8")
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Incrementally gzip a byte stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,185 @@
+# llm_client.py
+import hashlib
+import json
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+from singleflight import SingleFlight
+from config import (
+    TOGETHER_API_KEY,
+    TOGETHER_API_URL,
+    TOGETHER_MODEL,
+    LLM_POOL_SIZE,
+    LLM_KEEPALIVE_TIMEOUT,
+    LLM_DNS_CACHE_TTL,
+    LLM_CONNECT_TIMEOUT,
+    LLM_READ_TIMEOUT,
+)
+
+
+class LLMError(Exception):
+    """Raised when the Together API answers with a non-200 status."""
+
+    def __init__(self, status: int, text: str):
+        super().__init__(f"{status} - {text}")
+        self.status = status
+        self.text = text
+
+
+class LLMClient:
+    """
+    App-scoped client for the Together chat-completions API.
+    Owns one aiohttp session backed by a bounded keep-alive connection pool,
+    so agents reuse TCP/TLS connections instead of handshaking on every call.
+    """
+
+    def __init__(
+        self,
+        url: str = TOGETHER_API_URL,
+        api_key: Optional[str] = TOGETHER_API_KEY,
+        pool_size: int = LLM_POOL_SIZE,
+        keepalive_timeout: float = LLM_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl: int = LLM_DNS_CACHE_TTL,
+        connect_timeout: float = LLM_CONNECT_TIMEOUT,
+        read_timeout: float = LLM_READ_TIMEOUT,
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Identical concurrent completions share one upstream request.
+        self._inflight = SingleFlight()
+
+    async def start(self):
+        """Open the pooled session. Called from the FastAPI startup hook."""
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+        )
+        logging.info(f"LLM client started (pool size {self.pool_size})")
+
+    async def close(self):
+        """Close the session and its pooled connections. Called at shutdown."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # Lazily start for callers running outside the FastAPI lifecycle.
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    def _timeout(self, connect_timeout: Optional[float], read_timeout: Optional[float]) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            sock_connect=connect_timeout if connect_timeout is not None else self.connect_timeout,
+            sock_read=read_timeout if read_timeout is not None else self.read_timeout,
+        )
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = TOGETHER_MODEL,
+        temperature: float = 0.7,
+        max_tokens: int = 150,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Sends a chat-completions request and returns the stripped message content.
+        Concurrent calls with an identical payload are coalesced into one request.
+        Raises LLMError on a non-200 response.
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+        timeout = self._timeout(connect_timeout, read_timeout)
+        return await self._inflight.do(key, lambda: self._post_completion(payload, timeout))
+
+    async def _post_completion(self, payload: Dict, timeout: aiohttp.ClientTimeout) -> str:
+        session = await self._get_session()
+        async with session.post(self.url, json=payload, timeout=timeout) as response:
+            if response.status != 200:
+                raise LLMError(response.status, await response.text())
+            data = await response.json()
+            return data["choices"][0]["message"]["content"].strip()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "coalesced": self._inflight.coalesced
+        }
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = TOGETHER_MODEL,
+        temperature: float = 0.7,
+        max_tokens: int = 150,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Sends a chat-completions request with stream=True and yields content
+        deltas as they arrive on the SSE response.
+        Raises LLMError on a non-200 response.
+        """
+        session = await self._get_session()
+        async with session.post(
+            self.url,
+            json={
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "stream": True
+            },
+            timeout=self._timeout(connect_timeout, read_timeout),
+        ) as response:
+            if response.status != 200:
+                raise LLMError(response.status, await response.text())
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8").strip()
+                # SSE frames look like "data: {...}"; skip keep-alives and comments.
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    logging.warning(f"Skipping malformed SSE chunk: {data}")
+                    continue
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                delta = (choices[0].get("delta") or {}).get("content") or choices[0].get("text")
+                if delta:
+                    yield delta
+
+
+# Shared instance used by every agent.
+llm_client = LLMClient()
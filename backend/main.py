@@ -1,14 +1,24 @@
 # main.py
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import asyncio
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, status
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from typing import Dict
 from fastapi.middleware.cors import CORSMiddleware
-from routes import authentication, users, social_post, voice
+from routes import authentication, users, social_post, voice, conversations
+from routes.oauth2 import get_current_user
 from fastapi.templating import Jinja2Templates
 
 from agents import VoiceInputAgent, ConversationSimulatorAgent, FeedbackAgent
-from database import init_db, save_conversation
+from database import init_db, save_conversation_in_background, conversation_log_buffer, async_session
+from llm_client import llm_client
+from response_cache import response_cache
+from routes.hashing import password_hasher
+from repository.watsonx_client import watsonx_pool
+from repository.speech import transcribe_pcm
+from repository.seo_langgraph import seo_stats
+from repository.post_jobs import post_job_queue, post_pipeline_metrics
+from repository.scheduler import post_scheduler
 
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -42,6 +52,7 @@ app.include_router(authentication.router)
 app.include_router(users.router)
 app.include_router(social_post.router)
 app.include_router(voice.router)
+app.include_router(conversations.router)
 
 # Mount static files
 # app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -52,10 +63,48 @@ templates = Jinja2Templates(directory="templates")
 # Store active connections
 connections: Dict[str, WebSocket] = {}
 
+# Feedback generation tasks from every /ws/voice connection. They outlive
+# their connection and are awaited on shutdown, before the log buffer drains.
+feedback_tasks = set()
+FEEDBACK_SHUTDOWN_TIMEOUT = 30
+# Startup work that runs in the background (held so it is not garbage-collected)
+startup_tasks = set()
+
 @app.on_event("startup")
 async def startup():
     # Initialize the database
     await init_db()
+    # Start the write-behind buffer for conversation logs
+    await conversation_log_buffer.start()
+    # Start the workers for queued social posts
+    await post_job_queue.start()
+    # Publish scheduled posts as they come due
+    await post_scheduler.start()
+    # Open the pooled LLM client shared by all agents
+    await llm_client.start()
+    # Build the Watsonx client used by the voice sales coach
+    await watsonx_pool.start()
+    # Fill the TTS cache with common phrases without delaying startup
+    task = asyncio.create_task(voice.warm_tts_cache())
+    startup_tasks.add(task)
+    task.add_done_callback(startup_tasks.discard)
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in startup_tasks:
+        task.cancel()
+    # Let in-flight feedback reach the log buffer
+    if feedback_tasks:
+        await asyncio.wait(feedback_tasks, timeout=FEEDBACK_SHUTDOWN_TIMEOUT)
+    # Drain buffered conversation logs, then release pooled LLM connections
+    await conversation_log_buffer.stop()
+    # Lets running post jobs finish (within a grace period) before stopping the workers
+    await post_job_queue.stop()
+    await post_scheduler.stop()
+    await llm_client.close()
+    response_cache.close()
+    password_hasher.shutdown()
+    watsonx_pool.shutdown()
 
 @app.get("/")
 async def get():
@@ -64,17 +113,119 @@ async def get():
         html_content = f.read()
     return HTMLResponse(content=html_content, status_code=200)
 
+@app.get("/metrics/response_cache")
+async def response_cache_metrics():
+    # Hit/miss counters for the coach response cache
+    return response_cache.stats()
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    # In-flight and coalesced request counts for the shared LLM client
+    return llm_client.stats()
+
+@app.get("/metrics/conversation_logs")
+async def conversation_log_metrics():
+    # Queue depth and flush counters for the conversation log buffer
+    return conversation_log_buffer.stats()
+
+@app.get("/metrics/password_hashing")
+async def password_hashing_metrics():
+    # Queue depth and worker usage for the bcrypt pool
+    return password_hasher.stats()
+
+@app.get("/metrics/watsonx")
+async def watsonx_metrics():
+    # Per-call latency for the Watsonx sales coach
+    return watsonx_pool.stats()
+
+@app.get("/metrics/tts_cache")
+async def tts_cache_metrics():
+    # Tier sizes and hit counters for the TTS audio cache
+    return voice.tts_cache.stats()
+
+@app.get("/metrics/seo")
+async def seo_metrics():
+    # SEO optimization result cache
+    return seo_stats()
+
+@app.get("/metrics/social_post")
+async def social_post_metrics():
+    # Per-stage latency for the social post pipeline
+    return post_pipeline_metrics.stats()
+
+@app.get("/metrics/post_jobs")
+async def post_job_metrics():
+    # Queue depth and worker utilization for background post jobs
+    return await post_job_queue.stats()
+
+@app.get("/metrics/scheduler")
+async def scheduler_metrics():
+    # Backlog, in-flight posts and publishing lag for scheduled posts
+    return await post_scheduler.stats()
+
 @app.websocket("/ws/voice")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, token: str = ""):
     await websocket.accept()
     
+    # Conversations are logged under the signed-in user's id, so they can be
+    # read back from /conversations/{user_id}. Browsers cannot set an
+    # Authorization header on WebSockets, so the access token is passed as
+    # ?token=. Sessions without a token are logged under "default_user",
+    # which no account can read.
+    user_id = "default_user"
+    if token:
+        try:
+            async with async_session() as db:
+                current_user = await get_current_user(token=token, db=db)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        user_id = str(current_user.id)
+    
+    # Clients that send raw 16-bit mono PCM instead of browser transcripts
+    # connect with /ws/voice?audio=pcm; their audio is gated by the VAD
+    # before speech-to-text.
+    if websocket.query_params.get("audio") == "pcm":
+        speech_config = voice.build_speech_config()
+        transcribe = lambda pcm, rate: transcribe_pcm(speech_config, pcm, rate)
+    else:
+        transcribe = None
+    
     # Initialize agents
-    voice_input_agent = VoiceInputAgent()
-    conversation_agent = ConversationSimulatorAgent()
+    voice_input_agent = VoiceInputAgent(transcribe=transcribe)
+    conversation_agent = ConversationSimulatorAgent(user_id=user_id)
     feedback_agent = FeedbackAgent()
     
-    conversation_history = []
-    user_id = "default_user"  # Replace with actual user identification logic
+    # Clients opt into token streaming with /ws/voice?stream=true
+    stream = websocket.query_params.get("stream", "false").lower() in ("1", "true", "yes")
+    
+    # Cleared on disconnect; pending feedback is still generated and logged,
+    # only the send to this client is skipped.
+    connected = asyncio.Event()
+    connected.set()
+    
+    def spawn(coro):
+        task = asyncio.create_task(coro)
+        feedback_tasks.add(task)
+        task.add_done_callback(feedback_tasks.discard)
+    
+    async def send_feedback(history_snapshot, transcription):
+        try:
+            feedback = await feedback_agent.process(history_snapshot)
+        except Exception as e:
+            print(f"Feedback generation error: {e}")
+            return
+        save_conversation_in_background(user_id=user_id, transcript=transcription, analysis=feedback)
+        if not connected.is_set():
+            return
+        try:
+            await websocket.send_json({
+                "type": "feedback",
+                "transcription": transcription,
+                "feedback": feedback
+            })
+        except Exception as e:
+            print(f"Feedback delivery error: {e}")
     
     try:
         while True:
@@ -85,25 +236,28 @@ async def websocket_endpoint(websocket: WebSocket):
             transcription = await voice_input_agent.process(audio_chunk)
             
             if transcription:
-                # Add to conversation history
-                conversation_history.append({"role": "user", "message": transcription})
-                
                 # Generate and speak response
-                response_text, audio_response = await conversation_agent.process_and_speak(transcription)
-                conversation_history.append({"role": "agent", "message": response_text})
-                
-                # Generate feedback
-                feedback = await feedback_agent.process(conversation_history)
+                if stream:
+                    # Forward partial response text as the LLM produces it
+                    parts = []
+                    async for delta in conversation_agent.stream_and_speak(transcription):
+                        parts.append(delta)
+                        await websocket.send_json({"type": "delta", "response_text": delta})
+                    response_text, audio_response = "".join(parts).strip(), ""
+                else:
+                    response_text, audio_response = await conversation_agent.process_and_speak(transcription)
                 
-                # Save conversation log
-                await save_conversation(user_id=user_id, transcript=transcription, analysis=feedback)
-                
-                # Send response back to client
-                await websocket.send_json({
+                # Send response back to client as soon as it is ready
+                reply_frame = {
                     "transcription": transcription,
-                    "response_text": response_text,
-                    "feedback": feedback
-                })
+                    "response_text": response_text
+                }
+                if stream:
+                    reply_frame["type"] = "final"
+                await websocket.send_json(reply_frame)
+                
+                # Feedback and its log entry are produced off the critical path
+                spawn(send_feedback(conversation_agent.conversation_history[-2:], transcription))
                 
                 # Send audio response if available
                 if audio_response:
@@ -111,6 +265,10 @@ async def websocket_endpoint(websocket: WebSocket):
                 
     except WebSocketDisconnect:
         print("Client disconnected")
+    finally:
+        # Pending feedback keeps running so its log row is saved; it just isn't sent
+        connected.clear()
+        conversation_agent.close()
 
 if __name__ == "__main__":
     import uvicorn
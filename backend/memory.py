@@ -0,0 +1,117 @@
+# memory.py
+import asyncio
+import logging
+from collections import deque
+from itertools import islice
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for prompt budgeting."""
+    return max(1, len(text or "") // 4)
+
+
+class ConversationMemory:
+    """
+    Bounded conversation memory for a single session.
+
+    Keeps the most recent turns that fit within `token_budget` and folds
+    older turns into a running summary. The summary is refreshed every
+    `summary_interval` evicted turns, so per-session memory and prompt size
+    stay flat however long the conversation runs. Evicted turns are kept
+    until a summary that includes them succeeds; each refresh folds in at
+    most `2 * summary_interval` of them.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 800,
+        summary_token_budget: int = 200,
+        summary_interval: int = 4,
+        max_turns: int = 50,
+    ):
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.summary_interval = summary_interval
+        self.turns: deque = deque(maxlen=max_turns)
+        self.summary = ""
+        self._window_tokens = 0
+        # Turns evicted from the window but not yet folded into the summary.
+        self._pending: deque = deque()
+        self._summary_task: Optional[asyncio.Task] = None
+
+    def append(self, role: str, content: str):
+        if len(self.turns) == self.turns.maxlen:
+            self._evict()
+        tokens = estimate_tokens(content)
+        self.turns.append({"role": role, "content": content, "tokens": tokens})
+        self._window_tokens += tokens
+        self._trim()
+
+    def set_token_budget(self, token_budget: int):
+        """Changes the window size, evicting older turns if it shrank."""
+        self.token_budget = token_budget
+        self._trim()
+
+    def _trim(self):
+        # Always keep the latest turn, even if it alone exceeds the budget.
+        while self._window_tokens > self.token_budget and len(self.turns) > 1:
+            self._evict()
+
+    def _evict(self):
+        turn = self.turns.popleft()
+        self._window_tokens -= turn["tokens"]
+        self._pending.append(turn)
+
+    @property
+    def history(self) -> List[Dict[str, str]]:
+        """Turns currently inside the window, oldest first."""
+        return [{"role": t["role"], "content": t["content"]} for t in self.turns]
+
+    def build_messages(self, system_prompt: str) -> List[Dict[str, str]]:
+        """System prompt, running summary (if any), then the recent window."""
+        messages = [{"role": "system", "content": system_prompt}]
+        if self.summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {self.summary}"
+            })
+        messages.extend(self.history)
+        return messages
+
+    @property
+    def has_context(self) -> bool:
+        """True when anything besides the latest turn would be sent to the model."""
+        return bool(self.summary) or len(self.turns) > 1
+
+    def maybe_refresh_summary(self, summarize: Callable[[str, List[Dict[str, str]]], Awaitable[str]]):
+        """
+        Starts a background summary refresh once enough turns have been evicted.
+        `summarize(previous_summary, turns)` returns the new summary text.
+        """
+        if len(self._pending) < self.summary_interval:
+            return
+        if self._summary_task is not None and not self._summary_task.done():
+            return
+        # Oldest first; they leave _pending only once the summary succeeds,
+        # and turns evicted meanwhile queue up behind them.
+        turns = [{"role": t["role"], "content": t["content"]}
+                 for t in islice(self._pending, self.summary_interval * 2)]
+        self._summary_task = asyncio.create_task(self._refresh_summary(summarize, turns))
+
+    async def _refresh_summary(self, summarize, turns: List[Dict[str, str]]):
+        try:
+            summary = await summarize(self.summary, turns)
+        except Exception as e:
+            # The turns stay pending and are retried on the next refresh.
+            logging.error(f"Conversation summary refresh failed: {str(e)}")
+            return
+        for _ in turns:
+            self._pending.popleft()
+        # Keep the summary itself within budget.
+        max_chars = self.summary_token_budget * 4
+        self.summary = summary.strip()[:max_chars]
+
+    def close(self):
+        if self._summary_task is not None and not self._summary_task.done():
+            self._summary_task.cancel()
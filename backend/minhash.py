@@ -0,0 +1,109 @@
+# minhash.py
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from response_cache import normalize_text
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """CRC32 hashes of the character `size`-grams of the normalized, lowercased text."""
+    text = normalize_text(text).lower()
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i:i + size].encode("utf-8")) for i in range(len(text) - size + 1)}
+
+
+class MinHashIndex:
+    """
+    Bounded LSH index for finding near-duplicate texts.
+
+    Each text gets a `num_perm`-value MinHash signature, computed for all
+    shingles at once with NumPy. The signature is split into `bands` bands,
+    and texts that share any band bucket become candidates. Candidates are
+    ranked by estimated Jaccard similarity (the fraction of matching
+    signature values). At most `maxsize` entries are kept, and the least
+    recently used entry is dropped together with its bucket memberships.
+    """
+
+    def __init__(self, maxsize: int = 2048, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.maxsize = maxsize
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        # key -> (signature, value), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[np.ndarray, Any]]" = OrderedDict()
+        self._buckets: List[Dict[bytes, Set[Hashable]]] = [{} for _ in range(bands)]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(shingles(text), dtype=np.uint64)
+        # (a * x + b) mod p for every permutation/shingle pair; a, x < 2**32 so it fits in 64 bits.
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=1)
+
+    def _bands(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key: Hashable, text: str, value: Any):
+        if key in self._entries:
+            self._remove(key)
+        signature = self.signature(text)
+        self._entries[key] = (signature, value)
+        for band, bucket in zip(self._bands(signature), self._buckets):
+            bucket.setdefault(band, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        signature, _ = self._entries.pop(key)
+        for band, bucket in zip(self._bands(signature), self._buckets):
+            members = bucket.get(band)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del bucket[band]
+
+    def query(self, text: str, threshold: float) -> Optional[Tuple[Hashable, float, Any]]:
+        """Most similar stored entry with estimated similarity >= threshold, as (key, similarity, value)."""
+        signature = self.signature(text)
+        candidates = set()
+        for band, bucket in zip(self._bands(signature), self._buckets):
+            candidates.update(bucket.get(band, ()))
+        best = None
+        for key in candidates:
+            stored, value = self._entries[key]
+            similarity = float(np.mean(stored == signature))
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (key, similarity, value)
+        if best is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(best[0])
+        self.hits += 1
+        return best
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
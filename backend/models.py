@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import String, Integer, Text, Column, DateTime
+from sqlalchemy import String, Integer, Text, Column, DateTime, Index
 from datetime import datetime
 from base import Base  # Import Base from base.py
 
@@ -11,6 +11,11 @@ class ConversationLog(Base):
     analysis = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Serves keyset-paginated history reads for a single user
+        Index("ix_conversation_logs_user_created_id", "user_id", "created_at", "id"),
+    )
+
 class User(Base):
     __tablename__ = "user_information"  # (Using lowercase table name is preferable)
     id = Column(Integer, primary_key=True, index=True)
@@ -19,3 +24,47 @@ class User(Base):
     password = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     facebook_token = Column(String, nullable=True)
+
+class PostJob(Base):
+    __tablename__ = "post_jobs"
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    status = Column(String(16), nullable=False, default="queued")  # queued, running, succeeded, failed
+    payload = Column(Text, nullable=False)  # JSON-encoded SocialPostRequest
+    result = Column(Text, nullable=True)  # JSON-encoded SocialPostResponse
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # A running job whose lease has expired (its worker died) can be claimed again.
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Serves the workers' "oldest claimable job" query
+        Index("ix_post_jobs_status_created", "status", "created_at"),
+    )
+
+class ScheduledPost(Base):
+    __tablename__ = "scheduled_posts"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    image_url = Column(String, nullable=True)
+    hashtags = Column(Text, nullable=True)  # JSON-encoded list
+    due_at = Column(DateTime, nullable=False)
+    status = Column(String(16), nullable=False, default="scheduled")  # scheduled, publishing, published, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    # Set while a scheduler holds the row; an expired claim means the publisher died mid-post.
+    claimed_until = Column(DateTime, nullable=True)
+    post_url = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    published_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Serves the scheduler's "next due posts" query
+        Index("ix_scheduled_posts_status_due", "status", "due_at"),
+        # Serves keyset-paginated listings for a single user
+        Index("ix_scheduled_posts_user_due_id", "user_id", "due_at", "id"),
+    )
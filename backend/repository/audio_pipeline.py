@@ -0,0 +1,163 @@
+import os
+import struct
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+# Bytes read from the upload per step.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 64 * 1024))
+# Length of each transcribed segment, in seconds.
+SEGMENT_SECONDS = float(os.getenv("SEGMENT_SECONDS", 15))
+# Analysis window, in milliseconds.
+ANALYSIS_WINDOW_MS = int(os.getenv("ANALYSIS_WINDOW_MS", 30))
+
+# data chunk size written by streaming encoders that do not know the length
+_UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+class UnsupportedAudioError(Exception):
+    pass
+
+
+class WavDecoder:
+    """
+    Incremental decoder for RIFF/WAVE 16-bit PCM.
+
+    feed() accepts arbitrary byte chunks and returns the mono 16-bit PCM
+    samples they complete; the header is parsed as soon as it has arrived.
+    Only the unparsed tail of the stream is buffered. Decoding stops at the
+    declared end of the data chunk, so trailing chunks (LIST, id3, ...) are
+    ignored; a size of 0xFFFFFFFF (length unknown) reads to the end.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self._in_data = False
+        # Bytes of the data chunk not yet decoded; None if its size is unknown
+        self._remaining: Optional[int] = None
+        self.sample_rate: Optional[int] = None
+        self.channels: Optional[int] = None
+
+    def feed(self, data: bytes) -> np.ndarray:
+        if self._in_data and self._remaining is not None and self._remaining < 2 * self.channels:
+            # Past the data chunk
+            return np.empty(0, dtype=np.int16)
+        self._buffer += data
+        if not self._in_data and not self._parse_header():
+            return np.empty(0, dtype=np.int16)
+        if self._remaining is not None:
+            self._buffer = self._buffer[:self._remaining]
+        frame_bytes = 2 * self.channels
+        usable = len(self._buffer) - len(self._buffer) % frame_bytes
+        samples = np.frombuffer(self._buffer[:usable], dtype="<i2")
+        self._buffer = self._buffer[usable:]
+        if self._remaining is not None:
+            self._remaining -= usable
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1).astype(np.int16)
+        return samples
+
+    def _parse_header(self) -> bool:
+        if len(self._buffer) < 12:
+            return False
+        riff, _, wave = struct.unpack("<4sI4s", self._buffer[:12])
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise UnsupportedAudioError("Expected a RIFF/WAVE file")
+        offset = 12
+        while True:
+            if len(self._buffer) < offset + 8:
+                return False
+            chunk_id, chunk_size = struct.unpack("<4sI", self._buffer[offset:offset + 8])
+            body = offset + 8
+            if chunk_id == b"data":
+                if self.sample_rate is None:
+                    raise UnsupportedAudioError("WAVE data chunk before fmt chunk")
+                self._buffer = self._buffer[body:]
+                self._in_data = True
+                self._remaining = None if chunk_size == _UNKNOWN_SIZE else chunk_size
+                return True
+            if len(self._buffer) < body + chunk_size:
+                return False
+            if chunk_id == b"fmt ":
+                if chunk_size < 16:
+                    raise UnsupportedAudioError("Invalid WAVE fmt chunk: too short")
+                audio_format, channels, sample_rate, _, _, bits = struct.unpack(
+                    "<HHIIHH", self._buffer[body:body + 16]
+                )
+                if audio_format != 1 or bits != 16:
+                    raise UnsupportedAudioError("Only 16-bit PCM WAVE audio is supported")
+                if channels == 0 or sample_rate == 0:
+                    raise UnsupportedAudioError("Invalid WAVE fmt chunk: no channels or sample rate")
+                self.channels = channels
+                self.sample_rate = sample_rate
+            # Chunks are word-aligned.
+            offset = body + chunk_size + (chunk_size & 1)
+
+
+def analyze_windows(samples: np.ndarray, sample_rate: int, window_ms: int = ANALYSIS_WINDOW_MS) -> Dict[str, float]:
+    """Per-window RMS level summary for one segment (vectorized)."""
+    window = max(1, sample_rate * window_ms // 1000)
+    usable = len(samples) - len(samples) % window
+    if usable == 0:
+        return {"rms_mean": 0.0, "rms_max": 0.0, "voiced_ratio": 0.0}
+    frames = samples[:usable].astype(np.float32).reshape(-1, window) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return {
+        "rms_mean": round(float(rms.mean()), 5),
+        "rms_max": round(float(rms.max()), 5),
+        "voiced_ratio": round(float(np.mean(rms > 0.02)), 3)
+    }
+
+
+async def process_upload(
+    read: Callable[[int], Awaitable[bytes]],
+    transcribe: Callable[[bytes, int], Awaitable[str]],
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    segment_seconds: float = SEGMENT_SECONDS,
+) -> AsyncIterator[Dict]:
+    """
+    Reads an upload `chunk_size` bytes at a time, decodes it, and yields one
+    result per `segment_seconds` of audio: timing, window analysis and the
+    segment's transcript. At most one segment of PCM is held in memory.
+    """
+    decoder = WavDecoder()
+    pending: List[np.ndarray] = []
+    pending_samples = 0
+    segment_start = 0
+    index = 0
+
+    async def emit(samples: np.ndarray):
+        nonlocal segment_start, index
+        rate = decoder.sample_rate
+        result = {
+            "segment": index,
+            "start": round(segment_start / rate, 3),
+            "end": round((segment_start + len(samples)) / rate, 3),
+            "analysis": analyze_windows(samples, rate),
+            "text": await transcribe(samples.tobytes(), rate)
+        }
+        segment_start += len(samples)
+        index += 1
+        return result
+
+    while True:
+        data = await read(chunk_size)
+        if not data:
+            break
+        samples = decoder.feed(data)
+        if not len(samples):
+            continue
+        pending.append(samples)
+        pending_samples += len(samples)
+        segment_length = int(segment_seconds * decoder.sample_rate)
+        while pending_samples >= segment_length:
+            joined = np.concatenate(pending)
+            yield await emit(joined[:segment_length])
+            rest = joined[segment_length:]
+            pending = [rest] if len(rest) else []
+            pending_samples = len(rest)
+
+    if decoder.sample_rate is None:
+        raise UnsupportedAudioError("No audio data found")
+    if pending_samples:
+        yield await emit(np.concatenate(pending))
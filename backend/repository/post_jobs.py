@@ -0,0 +1,315 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select, update, func, or_, and_
+
+from config import (
+    POST_SEO_TIMEOUT,
+    POST_IMAGE_TIMEOUT,
+    POST_JOB_WORKERS,
+    POST_JOB_POLL_INTERVAL,
+    POST_JOB_LEASE,
+    POST_JOB_MAX_ATTEMPTS,
+    POST_JOB_SHUTDOWN_GRACE,
+)
+from database import async_session
+from models import PostJob, User
+from repository.unsplash_client import get_image_by_id
+from repository.seo_langgraph import optimize_content_for_seo, fallback_seo_result
+from repository.post_pipeline import DAGExecutor, Stage, StageMetrics
+from repository.social_clients import SocialMediaManager
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+social_manager = SocialMediaManager()
+# Stage latencies for the post pipeline
+post_pipeline_metrics = StageMetrics()
+
+
+async def run_post_pipeline(post: Dict, facebook_token: Optional[str]) -> Dict:
+    """
+    SEO optimization and image lookup are independent and run concurrently;
+    publishing waits for both. Returns the SocialPostResponse body.
+
+    Publishing has no stage timeout: a cancelled request may already have
+    been accepted by Facebook, and httpx bounds the call itself.
+    """
+    async def optimize(results):
+        return await optimize_content_for_seo(post["content"])
+
+    async def resolve_image(results):
+        # If there's an Unsplash image ID, get the full image URL
+        if post.get("unsplash_image_id"):
+            return await get_image_by_id(post["unsplash_image_id"])
+        return None
+
+    async def publish(results):
+        optimized_content = results["seo"]
+        # Post to Facebook with optimized content
+        return await social_manager.post_to_facebook(
+            content=optimized_content["facebook_content"],
+            image_url=results["image"],
+            hashtags=optimized_content["hashtags"],
+            facebook_token=facebook_token
+        )
+
+    pipeline = DAGExecutor([
+        Stage("seo", optimize, timeout=POST_SEO_TIMEOUT,
+              fallback=lambda results, error: fallback_seo_result(post["content"])),
+        Stage("image", resolve_image, timeout=POST_IMAGE_TIMEOUT,
+              fallback=lambda results, error: None),
+        Stage("publish", publish, depends_on=("seo", "image"),
+              fallback=lambda results, error: {
+                  "success": False,
+                  "status": f"Failed to post to Facebook: {str(error)}",
+                  "error": str(error)
+              }),
+    ], metrics=post_pipeline_metrics)
+    results, timings = await pipeline.run()
+
+    optimized_content = results["seo"]
+    fb_result = results["publish"]
+    return {
+        "success": fb_result["success"],
+        "fb_status": fb_result["status"],
+        "post_url": fb_result.get("post_url"),
+        "optimized_content": {
+            "original": post["content"],
+            "seo_optimized": optimized_content["seo_content"],
+            "hashtags": optimized_content["hashtags"],
+            "meta_description": optimized_content["meta_description"]
+        },
+        "timings": timings
+    }
+
+
+def job_status(job: PostJob) -> Dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error
+    }
+
+
+class PostJobQueue:
+    """
+    Database-backed queue for social post jobs.
+
+    enqueue() stores a `queued` row and returns at once. A fixed pool of
+    `workers` tasks claims jobs oldest first (SELECT ... FOR UPDATE SKIP
+    LOCKED, so several processes can share the table) and runs the post
+    pipeline. A claimed job holds a lease of `lease` seconds; if its process
+    dies, the job becomes claimable again once the lease expires, up to
+    `max_attempts` attempts.
+
+    stop() lets workers finish the jobs they are running, for up to
+    `shutdown_grace` seconds, and claims nothing new. A job still running
+    after that is cancelled and marked failed rather than retried, since
+    Facebook may already have the post.
+
+    Workers poll every `poll_interval` seconds and are woken immediately by
+    enqueue() in the same process. Watchers (e.g. WebSockets) can wait for
+    a job's next status change with wait_for_change().
+    """
+
+    def __init__(
+        self,
+        workers: int = POST_JOB_WORKERS,
+        poll_interval: float = POST_JOB_POLL_INTERVAL,
+        lease: float = POST_JOB_LEASE,
+        max_attempts: int = POST_JOB_MAX_ATTEMPTS,
+        shutdown_grace: float = POST_JOB_SHUTDOWN_GRACE,
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.shutdown_grace = shutdown_grace
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._watchers: Dict[str, Set[asyncio.Event]] = {}
+        self._started_at: Optional[float] = None
+        self._busy_seconds = 0.0
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+
+    async def enqueue(self, user_id: int, payload: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        async with async_session() as session:
+            session.add(PostJob(id=job_id, user_id=user_id, status="queued", payload=json.dumps(payload)))
+            await session.commit()
+        self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[PostJob]:
+        async with async_session() as session:
+            return await session.get(PostJob, job_id)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._stopping = False
+        self._started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        if not self._tasks:
+            return
+        # Idle workers exit at once; busy ones after their current job.
+        self._stopping = True
+        self._wakeup.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=self.shutdown_grace)
+        if pending:
+            logging.warning(f"Cancelling {len(pending)} post job(s) still running after {self.shutdown_grace}s")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    async def _claim(self) -> Optional[PostJob]:
+        now = datetime.utcnow()
+        async with async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(PostJob)
+                    .where(or_(
+                        PostJob.status == "queued",
+                        and_(PostJob.status == "running", PostJob.lease_expires_at < now)
+                    ))
+                    .order_by(PostJob.created_at)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                job = result.scalars().first()
+                if job is None:
+                    return None
+                if job.attempts >= self.max_attempts:
+                    job.status = "failed"
+                    job.error = f"Gave up after {job.attempts} attempts"
+                    job.finished_at = now
+                else:
+                    job.status = "running"
+                    job.attempts += 1
+                    job.started_at = now
+                    job.lease_expires_at = now + timedelta(seconds=self.lease)
+        self._notify(job.id)
+        return job if job.status == "running" else await self._claim()
+
+    async def _finish(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        async with async_session() as session:
+            await session.execute(
+                update(PostJob)
+                .where(PostJob.id == job_id)
+                .values(
+                    status=status,
+                    result=json.dumps(result, default=str) if result is not None else None,
+                    error=error,
+                    finished_at=datetime.utcnow(),
+                    lease_expires_at=None
+                )
+            )
+            await session.commit()
+        self._notify(job_id)
+
+    async def _worker(self):
+        while not self._stopping:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logging.error(f"Post job claim failed: {str(e)}")
+                job = None
+            if job is None:
+                if self._stopping:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.busy += 1
+            started = time.monotonic()
+            try:
+                await self._run(job)
+            finally:
+                self.busy -= 1
+                self._busy_seconds += time.monotonic() - started
+
+    async def _run(self, job: PostJob):
+        try:
+            async with async_session() as session:
+                user = await session.get(User, job.user_id)
+            facebook_token = user.facebook_token if user is not None else None
+            result = await run_post_pipeline(json.loads(job.payload), facebook_token)
+        except asyncio.CancelledError:
+            # Cancelled after the shutdown grace period: it may have been
+            # published already, so it is not left for a retry.
+            self.processed += 1
+            self.failed += 1
+            await self._finish(job.id, "failed", error="Interrupted by shutdown; not retried to avoid a duplicate post")
+            raise
+        except Exception as e:
+            logging.error(f"Post job {job.id} failed: {str(e)}")
+            self.processed += 1
+            self.failed += 1
+            await self._finish(job.id, "failed", error=str(e))
+            return
+        self.processed += 1
+        if not result["success"]:
+            self.failed += 1
+        await self._finish(job.id, "succeeded" if result["success"] else "failed", result=result)
+
+    def _notify(self, job_id: str):
+        for event in self._watchers.get(job_id, ()):
+            event.set()
+
+    async def wait_for_change(self, job_id: str, timeout: float):
+        """Waits until this process changes the job's status, or `timeout` seconds."""
+        event = asyncio.Event()
+        self._watchers.setdefault(job_id, set()).add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            watchers = self._watchers.get(job_id)
+            watchers.discard(event)
+            if not watchers:
+                del self._watchers[job_id]
+
+    async def stats(self) -> Dict:
+        async with async_session() as session:
+            result = await session.execute(
+                select(PostJob.status, func.count())
+                .where(PostJob.status.in_(("queued", "running")))
+                .group_by(PostJob.status)
+            )
+            counts = dict(result.all())
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        busy_seconds = self._busy_seconds
+        return {
+            "queue_depth": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "workers": self.workers,
+            "busy_workers": self.busy,
+            # Share of worker time spent running jobs since startup
+            "utilization": round(busy_seconds / (uptime * self.workers), 3) if uptime else 0.0,
+            "processed": self.processed,
+            "failed": self.failed
+        }
+
+
+post_job_queue = PostJobQueue()
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class StageError(Exception):
+    def __init__(self, stage: str, error: Exception):
+        self.stage = stage
+        self.error = error
+        super().__init__(f"Stage '{stage}' failed: {error}")
+
+
+class Stage:
+    """
+    One step of a pipeline. `fn(results)` receives the results of the stages
+    it depends on (by name). If it fails or exceeds `timeout` seconds, the
+    stage's result is `fallback(results, error)` when a fallback is given,
+    where `error` is the exception (asyncio.TimeoutError on timeout);
+    otherwise the whole run fails with StageError.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Dict[str, Any]], Awaitable[Any]],
+        depends_on: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        fallback: Optional[Callable[[Dict[str, Any], Exception], Any]] = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.fallback = fallback
+
+
+class StageMetrics:
+    """Per-stage call counts, failures and latency percentiles (seconds)."""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, stage: str, status: str, seconds: float):
+        entry = self._stages.setdefault(stage, {
+            "calls": 0, "timeouts": 0, "errors": 0, "latencies": deque(maxlen=self.window)
+        })
+        entry["calls"] += 1
+        if status == "timeout":
+            entry["timeouts"] += 1
+        elif status == "error":
+            entry["errors"] += 1
+        entry["latencies"].append(seconds)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for stage, entry in self._stages.items():
+            latencies = sorted(entry["latencies"])
+
+            def percentile(p: float) -> float:
+                return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+            result[stage] = {
+                "calls": entry["calls"],
+                "timeouts": entry["timeouts"],
+                "errors": entry["errors"],
+                "p50_seconds": percentile(0.5),
+                "p95_seconds": percentile(0.95),
+                "max_seconds": latencies[-1] if latencies else 0.0
+            }
+        return result
+
+
+class DAGExecutor:
+    """
+    Runs stages as a dependency graph: every stage starts as soon as the
+    stages it depends on have finished, so independent stages run
+    concurrently and a run takes as long as its slowest path rather than
+    the sum of all stages. Returns the results and a per-stage timing
+    report; each stage's timing is also recorded in `metrics`.
+    """
+
+    def __init__(self, stages: List[Stage], metrics: Optional[StageMetrics] = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.metrics = metrics
+        self._order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order, visiting, done = [], set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a cycle through '{name}'")
+            if name not in self.stages:
+                raise ValueError(f"Unknown pipeline stage '{name}'")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    async def run(self) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        started = time.perf_counter()
+
+        async def run_stage(stage: Stage):
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[name] for name in stage.depends_on))
+            inputs = {name: results[name] for name in stage.depends_on}
+            stage_started = time.perf_counter()
+            status, error = "ok", None
+            try:
+                result = await asyncio.wait_for(stage.fn(inputs), timeout=stage.timeout)
+            except asyncio.TimeoutError:
+                status, error = "timeout", asyncio.TimeoutError(f"timed out after {stage.timeout}s")
+            except Exception as e:
+                status, error = "error", e
+            elapsed = time.perf_counter() - stage_started
+            timings[stage.name] = {
+                "status": status,
+                "started_ms": round((stage_started - started) * 1000, 1),
+                "duration_ms": round(elapsed * 1000, 1)
+            }
+            if self.metrics is not None:
+                self.metrics.record(stage.name, status, elapsed)
+            if error is not None:
+                if stage.fallback is None:
+                    raise StageError(stage.name, error)
+                print(f"Pipeline stage '{stage.name}' failed: {str(error)}")
+                result = stage.fallback(inputs, error)
+            results[stage.name] = result
+
+        # Dependencies are created first, so every stage can await them.
+        for name in self._order:
+            tasks[name] = asyncio.create_task(run_stage(self.stages[name]))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        timings["total"] = {"duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+        return results, timings
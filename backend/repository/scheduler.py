@@ -0,0 +1,254 @@
+import asyncio
+import heapq
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import select, update, func
+
+from config import (
+    SCHEDULER_CONCURRENCY,
+    SCHEDULER_HORIZON,
+    SCHEDULER_REFILL_INTERVAL,
+    SCHEDULER_BATCH_SIZE,
+    SCHEDULER_LEASE,
+)
+from database import async_session
+from models import ScheduledPost, User
+from repository.post_jobs import social_manager
+
+
+class PostScheduler:
+    """
+    In-process scheduler that publishes ScheduledPost rows when they are due.
+
+    Every `refill_interval` seconds, the posts due within the next `horizon`
+    seconds are read (oldest first, at most `batch_size`) from the indexed
+    (status, due_at) query into a min-heap. Posts scheduled in this process
+    are pushed straight onto the heap. The loop sleeps until the head of the
+    heap is due, then claims due rows with SELECT ... FOR UPDATE SKIP LOCKED,
+    so several schedulers can share the table without posting twice. Only
+    as many rows are claimed as there are free publishing slots
+    (`concurrency`).
+
+    A row whose publisher died mid-post (its claim expired after `lease`
+    seconds) is marked failed rather than retried, since Facebook may
+    already have it.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = SCHEDULER_CONCURRENCY,
+        horizon: float = SCHEDULER_HORIZON,
+        refill_interval: float = SCHEDULER_REFILL_INTERVAL,
+        batch_size: int = SCHEDULER_BATCH_SIZE,
+        lease: float = SCHEDULER_LEASE,
+    ):
+        self.concurrency = concurrency
+        self.horizon = horizon
+        self.refill_interval = refill_interval
+        self.batch_size = batch_size
+        self.lease = lease
+        self._heap: List[Tuple[datetime, int]] = []
+        self._queued: Set[int] = set()
+        self._in_flight: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._next_refill = 0.0
+        self._more = False
+        # Counters
+        self.published = 0
+        self.failed = 0
+        self.claim_conflicts = 0
+        self._lag: deque = deque(maxlen=500)
+
+    def schedule(self, post_id: int, due_at: datetime):
+        """Tells the scheduler about a post created in this process."""
+        if due_at <= datetime.utcnow() + timedelta(seconds=self.horizon):
+            self._push(post_id, due_at)
+            self._wakeup.set()
+
+    def _push(self, post_id: int, due_at: datetime):
+        if post_id not in self._queued:
+            self._queued.add(post_id)
+            heapq.heappush(self._heap, (due_at, post_id))
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Posts being published are left to finish on their own.
+        if self._in_flight:
+            await asyncio.wait(self._in_flight, timeout=self.lease)
+
+    async def _refill(self):
+        now = datetime.utcnow()
+        async with async_session() as session:
+            await session.execute(
+                update(ScheduledPost)
+                .where(ScheduledPost.status == "publishing", ScheduledPost.claimed_until < now)
+                .values(
+                    status="failed",
+                    error="Publishing was interrupted; not retried to avoid a duplicate post",
+                    claimed_until=None
+                )
+            )
+            result = await session.execute(
+                select(ScheduledPost.id, ScheduledPost.due_at)
+                .where(
+                    ScheduledPost.status == "scheduled",
+                    ScheduledPost.due_at <= now + timedelta(seconds=self.horizon)
+                )
+                .order_by(ScheduledPost.due_at)
+                .limit(self.batch_size)
+            )
+            rows = result.all()
+            await session.commit()
+        for post_id, due_at in rows:
+            self._push(post_id, due_at)
+        # A full batch means more posts are due; read the rest as soon as the heap drains.
+        self._more = len(rows) == self.batch_size
+        self._next_refill = time.monotonic() + self.refill_interval
+
+    async def _run(self):
+        while True:
+            if time.monotonic() >= self._next_refill or (self._more and not self._heap):
+                try:
+                    await self._refill()
+                except Exception as e:
+                    logging.error(f"Scheduled post refill failed: {str(e)}")
+                    self._more = False
+                    self._next_refill = time.monotonic() + self.refill_interval
+
+            now = datetime.utcnow()
+            if self._heap and self._heap[0][0] <= now:
+                free = self.concurrency - len(self._in_flight)
+                if free <= 0:
+                    await asyncio.wait(self._in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                due = []
+                while self._heap and self._heap[0][0] <= now and len(due) < free:
+                    _, post_id = heapq.heappop(self._heap)
+                    self._queued.discard(post_id)
+                    due.append(post_id)
+                try:
+                    await self._claim_and_publish(due)
+                except Exception as e:
+                    logging.error(f"Scheduled post claim failed: {str(e)}")
+                continue
+
+            # Sleep until the next post is due, the next refill, or a new schedule.
+            timeout = self._next_refill - time.monotonic()
+            if self._heap:
+                timeout = min(timeout, (self._heap[0][0] - now).total_seconds())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, timeout))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim_and_publish(self, post_ids: List[int]):
+        now = datetime.utcnow()
+        async with async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(ScheduledPost)
+                    .where(
+                        ScheduledPost.id.in_(post_ids),
+                        ScheduledPost.status == "scheduled",
+                        ScheduledPost.due_at <= now
+                    )
+                    .with_for_update(skip_locked=True)
+                )
+                posts = result.scalars().all()
+                for post in posts:
+                    post.status = "publishing"
+                    post.attempts += 1
+                    post.claimed_until = now + timedelta(seconds=self.lease)
+        # Claimed by another scheduler, rescheduled or deleted since they were read
+        self.claim_conflicts += len(post_ids) - len(posts)
+        for post in posts:
+            task = asyncio.create_task(self._publish(post))
+            self._in_flight.add(task)
+            task.add_done_callback(self._publish_done)
+
+    def _publish_done(self, task: asyncio.Task):
+        self._in_flight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Scheduled post publish task failed: {str(task.exception())}")
+
+    async def _publish(self, post: ScheduledPost):
+        self._lag.append((datetime.utcnow() - post.due_at).total_seconds())
+        try:
+            async with async_session() as session:
+                user = await session.get(User, post.user_id)
+            fb_result = await social_manager.post_to_facebook(
+                content=post.content,
+                image_url=post.image_url,
+                hashtags=json.loads(post.hashtags) if post.hashtags else [],
+                facebook_token=user.facebook_token if user is not None else None
+            )
+        except Exception as e:
+            fb_result = {"success": False, "error": str(e)}
+
+        if fb_result["success"]:
+            self.published += 1
+        else:
+            self.failed += 1
+        try:
+            async with async_session() as session:
+                await session.execute(
+                    update(ScheduledPost)
+                    .where(ScheduledPost.id == post.id)
+                    .values(
+                        status="published" if fb_result["success"] else "failed",
+                        post_url=fb_result.get("post_url"),
+                        error=fb_result.get("error"),
+                        published_at=datetime.utcnow() if fb_result["success"] else None,
+                        claimed_until=None
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            # The row stays "publishing" and is marked failed once its claim expires.
+            logging.error(
+                f"Scheduled post {post.id} status update failed "
+                f"(published: {fb_result['success']}): {str(e)}"
+            )
+
+    async def stats(self) -> Dict:
+        async with async_session() as session:
+            result = await session.execute(
+                select(func.count())
+                .select_from(ScheduledPost)
+                .where(ScheduledPost.status == "scheduled", ScheduledPost.due_at <= datetime.utcnow())
+            )
+            overdue = result.scalar()
+        lag = sorted(self._lag)
+
+        def percentile(p: float) -> float:
+            return lag[min(len(lag) - 1, int(p * len(lag)))] if lag else 0.0
+
+        return {
+            "heap_size": len(self._heap),
+            "overdue": overdue,
+            "in_flight": len(self._in_flight),
+            "concurrency": self.concurrency,
+            "published": self.published,
+            "failed": self.failed,
+            "claim_conflicts": self.claim_conflicts,
+            # Seconds between due_at and the start of publishing
+            "lag_p50_seconds": percentile(0.5),
+            "lag_p95_seconds": percentile(0.95)
+        }
+
+
+post_scheduler = PostScheduler()
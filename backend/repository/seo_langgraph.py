@@ -1,9 +1,22 @@
-from typing import Dict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
+import hashlib
 import os
 from dotenv import load_dotenv
 
+from cache import LRUCache
+from minhash import MinHashIndex
+from singleflight import SingleFlight
+from response_cache import normalize_text
+from config import (
+    SEO_CACHE_SIZE,
+    SEO_CACHE_TTL,
+    SEO_BATCH_CONCURRENCY,
+    SEO_SIMILARITY_THRESHOLD,
+    SEO_SIMILARITY_INDEX_SIZE,
+)
+
 load_dotenv()
 
 # Initialize Gemini LLM using Google's Generative AI
@@ -13,96 +26,304 @@ llm = ChatGoogleGenerativeAI(
     temperature=0.7
 )
 
+SEO_SECTIONS = ['SEO_VERSION', 'FACEBOOK_VERSION', 'HASHTAGS', 'META_DESCRIPTION', 'IMAGE_ALT']
+# Result key for each section header
+SECTION_KEYS = {
+    'SEO_VERSION': 'seo_content',
+    'FACEBOOK_VERSION': 'facebook_content',
+    'HASHTAGS': 'hashtags',
+    'META_DESCRIPTION': 'meta_description',
+    'IMAGE_ALT': 'image_alt',
+}
+
+# Prompt with clear instructions for optimization.
+seo_prompt = ChatPromptTemplate.from_template("""
+    As an SEO expert, optimize this content for social media and search engines:
+    {content}
+
+    Please provide:
+    1. SEO-optimized version with relevant keywords
+    2. Facebook-optimized version (engaging, shareable)
+    3. Key hashtags (max 5, comma-separated)
+    4. Meta description (under 160 characters)
+    5. Suggested image description for better accessibility
+
+    Format the response exactly as follows:
+    SEO_VERSION: [optimized content]
+    FACEBOOK_VERSION: [facebook content]
+    HASHTAGS: [comma-separated hashtags]
+    META_DESCRIPTION: [meta description]
+    IMAGE_ALT: [image description]
+""")
+
+# The chain is built once and shared by every call.
+seo_chain = seo_prompt | llm
+
+# Successful optimizations, keyed by a digest of the normalized draft
+seo_cache = LRUCache(maxsize=SEO_CACHE_SIZE, ttl=SEO_CACHE_TTL)
+# Recently optimized drafts, for reusing results across near-duplicate drafts
+seo_similar = MinHashIndex(maxsize=SEO_SIMILARITY_INDEX_SIZE)
+_inflight = SingleFlight()
+
+
+def content_key(content: str) -> str:
+    return hashlib.sha256(normalize_text(content).encode("utf-8")).hexdigest()
+
+
+class SEOSectionParser:
+    """
+    Incremental version of the section parser for streamed model output.
+    feed() takes text deltas and returns the (header, value) sections they
+    completed: a section is complete once the next header starts, and the
+    last one when close() is called. Only the unfinished line is buffered.
+    """
+
+    def __init__(self):
+        self._partial = ""
+        self._section = None
+        self._lines: List[str] = []
+
+    def feed(self, delta: str) -> List[Tuple[str, str]]:
+        lines = (self._partial + delta).split('\n')
+        self._partial = lines.pop()
+        completed = []
+        for line in lines:
+            section = self._line(line)
+            if section:
+                completed.append(section)
+        return completed
+
+    def close(self) -> List[Tuple[str, str]]:
+        completed = self.feed('\n')
+        if self._section:
+            completed.append(self._finish())
+        return completed
+
+    def _finish(self) -> Tuple[str, str]:
+        section = (self._section, '\n'.join(self._lines).strip())
+        self._section = None
+        self._lines = []
+        return section
+
+    def _line(self, line: str) -> Optional[Tuple[str, str]]:
+        line = line.strip()
+        if not line:
+            return None
+        # Check if the line starts with one of the expected section headers.
+        if ':' in line:
+            header, value = line.split(':', 1)
+            header = header.strip().upper()
+            if header in SEO_SECTIONS:
+                # The previous section (if any) is complete.
+                previous = self._finish() if self._section else None
+                self._section = header
+                self._lines = [value.strip()]
+                return previous
+        # Append to current section content if it doesn't look like a header.
+        if self._section:
+            self._lines.append(line)
+        return None
+
+
+def parse_seo_response(response_text: str) -> Dict[str, str]:
+    """Splits the model output into its SEO_VERSION, FACEBOOK_VERSION, ... sections."""
+    parser = SEOSectionParser()
+    return dict(parser.feed(response_text) + parser.close())
+
+
+def split_hashtags(value: str) -> List[str]:
+    return [tag.strip() for tag in value.split(',') if tag.strip()]
+
+
+def build_seo_result(sections: Dict[str, str], content: str) -> Dict[str, str]:
+    # Default fallbacks for sections the model left out.
+    return {
+        "seo_content": sections.get('SEO_VERSION', content),
+        "facebook_content": sections.get('FACEBOOK_VERSION', content),
+        "hashtags": split_hashtags(sections.get('HASHTAGS', '')),
+        "meta_description": sections.get('META_DESCRIPTION', ''),
+        "image_alt": sections.get('IMAGE_ALT', ''),
+        "original_content": content
+    }
+
+
+def fallback_seo_result(content: str) -> Dict[str, str]:
+    # The original content with basic defaults.
+    return {
+        "seo_content": content,
+        "facebook_content": content,
+        "hashtags": [],
+        "meta_description": content[:157] + "..." if len(content) > 160 else content,
+        "image_alt": "",
+        "original_content": content
+    }
+
+
+def _from_cache(cached: Dict, content: str) -> Dict:
+    # Copies, so callers can't modify the cached entry.
+    return {**cached, "hashtags": list(cached["hashtags"]), "original_content": content}
+
+
+def _from_similar(similar: Dict, content: str) -> Dict:
+    # A near-duplicate can differ in exactly the fact that matters (a price, a
+    # day), so only its keywords carry over; the post text is the submitted draft.
+    return {
+        **fallback_seo_result(content),
+        "hashtags": list(similar["hashtags"]),
+        "meta_description": similar["meta_description"]
+    }
+
+
+def _lookup(key: str, content: str) -> Optional[Dict]:
+    """Cached result for this draft, or one built from a stored draft similar enough to reuse."""
+    cached = seo_cache.get(key)
+    if cached is not None:
+        return _from_cache(cached, content)
+    near = seo_similar.query(content, SEO_SIMILARITY_THRESHOLD)
+    # The index has no TTL of its own; only reuse results still inside SEO_CACHE_TTL.
+    if near is not None and near[0] in seo_cache:
+        return _from_similar(near[2], content)
+    return None
+
+
+def _store(key: str, content: str, optimized: Dict):
+    seo_cache.set(key, optimized)
+    seo_similar.add(key, content, optimized)
+
+
 async def optimize_content_for_seo(content: str) -> Dict[str, str]:
     """
     Optimize the input content using Gemini for SEO and social media platforms.
-    
-    Steps:
-    1. Create a specialized prompt that instructs the LLM to optimize the content.
-    2. Create a chain that connects the prompt and the LLM.
-    3. Invoke the chain asynchronously with the given content.
-    4. Parse the returned text into sections using the specified format.
-    5. Return a dictionary with keys:
+
+    Returns a dictionary with keys:
        - 'seo_content': Optimized text for SEO
        - 'facebook_content': Version tailored for Facebook posting
        - 'hashtags': A list of hashtags (split by commas)
        - 'meta_description': A short meta description
        - 'image_alt': Suggested alternative text for images
        - 'original_content': The original content
-    6. If any error occurs during the process, catch the exception and return fallback values.
+
+    Results are cached by content hash for SEO_CACHE_TTL seconds. A draft
+    whose MinHash similarity to a recently optimized one is at least
+    SEO_SIMILARITY_THRESHOLD (e.g. one word or emoji changed) reuses that
+    result's hashtags and meta description; its seo_content and
+    facebook_content are the submitted draft itself. Concurrent requests
+    for the same draft share one Gemini call.
+    If any error occurs, fallback values are returned (and not cached).
     """
-    # Step 1: Create a prompt with clear instructions for optimization.
-    seo_prompt = ChatPromptTemplate.from_template("""
-        As an SEO expert, optimize this content for social media and search engines:
-        {content}
-
-        Please provide:
-        1. SEO-optimized version with relevant keywords
-        2. Facebook-optimized version (engaging, shareable)
-        3. Key hashtags (max 5, comma-separated)
-        4. Meta description (under 160 characters)
-        5. Suggested image description for better accessibility
-        
-        Format the response exactly as follows:
-        SEO_VERSION: [optimized content]
-        FACEBOOK_VERSION: [facebook content]
-        HASHTAGS: [comma-separated hashtags]
-        META_DESCRIPTION: [meta description]
-        IMAGE_ALT: [image description]
-    """)
-    
-    # Step 2: Create a chain connecting the prompt with the Gemini LLM.
-    seo_chain = seo_prompt | llm
-    
-    try:
-        # Step 3: Execute the chain asynchronously.
+    key = content_key(content)
+    cached = _lookup(key, content)
+    if cached is not None:
+        return cached
+
+    async def run():
         result = await seo_chain.ainvoke({"content": content})
-        response_text = result.content
-        
-        # Step 4: Parse the returned text.
-        sections = {}
-        current_section = None
-        current_content = []
-        for line in response_text.split('\n'):
-            line = line.strip()
-            if line:
-                # Check if the line starts with one of the expected section headers.
-                if ':' in line:
-                    header, value = line.split(':', 1)
-                    header = header.strip().upper()
-                    if header in ['SEO_VERSION', 'FACEBOOK_VERSION', 'HASHTAGS', 'META_DESCRIPTION', 'IMAGE_ALT']:
-                        # Save previous section if any.
-                        if current_section:
-                            sections[current_section] = '\n'.join(current_content).strip()
-                        current_section = header
-                        current_content = [value.strip()]
-                    else:
-                        # Append to current section content if it doesn't look like a header.
-                        if current_section:
-                            current_content.append(line)
+        optimized = build_seo_result(parse_seo_response(result.content), content)
+        _store(key, content, optimized)
+        return optimized
+
+    try:
+        return _from_cache(await _inflight.do(key, run), content)
+    except Exception as e:
+        print(f"SEO optimization error: {str(e)}")
+        return fallback_seo_result(content)
+
+
+async def optimize_contents_for_seo(
+    contents: List[str],
+    max_concurrency: int = SEO_BATCH_CONCURRENCY,
+) -> List[Dict[str, str]]:
+    """
+    Optimize many drafts at once. Cached, near-duplicate and repeated drafts are answered
+    without a model call; the rest go through seo_chain.abatch with at most
+    `max_concurrency` Gemini calls in flight. Results are in input order and
+    a failed draft gets the fallback result without failing the batch.
+    """
+    results: List[Dict] = [None] * len(contents)
+    # content key -> indexes of the drafts waiting on it
+    pending: Dict[str, List[int]] = {}
+    for index, content in enumerate(contents):
+        key = content_key(content)
+        if key in pending:
+            pending[key].append(index)
+            continue
+        cached = _lookup(key, content)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending[key] = [index]
+
+    if pending:
+        keys = list(pending)
+        outputs = await seo_chain.abatch(
+            [{"content": contents[pending[key][0]]} for key in keys],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True
+        )
+        for key, output in zip(keys, outputs):
+            first = contents[pending[key][0]]
+            if isinstance(output, Exception):
+                print(f"SEO optimization error: {str(output)}")
+                optimized = None
+            else:
+                optimized = build_seo_result(parse_seo_response(output.content), first)
+                _store(key, first, optimized)
+            for index in pending[key]:
+                if optimized is None:
+                    results[index] = fallback_seo_result(contents[index])
                 else:
-                    if current_section:
-                        current_content.append(line)
-        if current_section:
-            sections[current_section] = '\n'.join(current_content).strip()
-        
-        # Step 5: Build the return dictionary with default fallbacks.
-        return {
-            "seo_content": sections.get('SEO_VERSION', content),
-            "facebook_content": sections.get('FACEBOOK_VERSION', content),
-            "hashtags": [tag.strip() for tag in sections.get('HASHTAGS', '').split(',') if tag.strip()],
-            "meta_description": sections.get('META_DESCRIPTION', ''),
-            "image_alt": sections.get('IMAGE_ALT', ''),
-            "original_content": content
-        }
+                    results[index] = _from_cache(optimized, contents[index])
+    return results
+
+
+async def stream_content_for_seo(content: str) -> AsyncIterator[Tuple[str, object]]:
+    """
+    Streaming variant of optimize_content_for_seo. Yields ("section", {...})
+    for each section as soon as Gemini has finished writing it, then
+    ("done", result) with the same dictionary optimize_content_for_seo
+    returns. Cached and near-duplicate drafts are replayed without a model call. On error,
+    ("error", message) is yielded before the fallback result.
+    """
+    key = content_key(content)
+    result = _lookup(key, content)
+    if result is not None:
+        for header, result_key in SECTION_KEYS.items():
+            yield "section", {"section": header, "key": result_key, "value": result[result_key]}
+        yield "done", result
+        return
+
+    parser = SEOSectionParser()
+    sections: Dict[str, str] = {}
+
+    def emit(completed):
+        for header, value in completed:
+            sections[header] = value
+            yield "section", {
+                "section": header,
+                "key": SECTION_KEYS[header],
+                "value": split_hashtags(value) if header == 'HASHTAGS' else value
+            }
+
+    try:
+        async for chunk in seo_chain.astream({"content": content}):
+            for event in emit(parser.feed(chunk.content)):
+                yield event
+        for event in emit(parser.close()):
+            yield event
     except Exception as e:
         print(f"SEO optimization error: {str(e)}")
-        # Step 6: Fallback: return the original content with basic defaults.
-        return {
-            "seo_content": content,
-            "facebook_content": content,
-            "hashtags": [],
-            "meta_description": content[:157] + "..." if len(content) > 160 else content,
-            "image_alt": "",
-            "original_content": content
-        }
+        yield "error", str(e)
+        yield "done", fallback_seo_result(content)
+        return
+
+    optimized = build_seo_result(sections, content)
+    _store(key, content, optimized)
+    yield "done", _from_cache(optimized, content)
+
+
+def seo_stats() -> Dict[str, int]:
+    return {
+        **seo_cache.stats(),
+        "coalesced": _inflight.coalesced,
+        "near_duplicate": seo_similar.stats()
+    }
@@ -1,3 +1,4 @@
+import os
 import facebook
 from typing import Dict, Optional
 import aiohttp
@@ -0,0 +1,319 @@
+import asyncio
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import azure.cognitiveservices.speech as speechsdk
+
+# Size of each audio frame sent to the client (~0.7s of 48 kbit/s MP3).
+TTS_CHUNK_SIZE = int(os.getenv("TTS_CHUNK_SIZE", 4096))
+# Threads reserved for blocking Azure synthesis calls.
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", 8))
+
+_tts_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="azure-tts")
+
+# Sentences synthesized ahead of the one currently being sent.
+TTS_LOOKAHEAD = int(os.getenv("TTS_LOOKAHEAD", 2))
+
+# Client audio: 16-bit mono PCM at this sample rate.
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", 16000))
+# Frames buffered per connection before the WebSocket reader is paused.
+AUDIO_MAX_BUFFERED_FRAMES = int(os.getenv("AUDIO_MAX_BUFFERED_FRAMES", 50))
+
+_END = object()
+
+# End of sentence: terminal punctuation (plus closing quotes/brackets) followed by whitespace, or a newline.
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n+")
+
+
+class SpeechSynthesisError(Exception):
+    pass
+
+
+async def stream_synthesis(
+    synthesizer: speechsdk.SpeechSynthesizer,
+    text: str,
+    chunk_size: int = TTS_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Synthesize `text` and yield the audio in `chunk_size` pieces while Azure
+    is still producing it.
+
+    The blocking SDK calls run on a dedicated executor: synthesis is started
+    with start_speaking_text_async and read back through an AudioDataStream,
+    so the first chunk is available long before synthesis completes. Closing
+    the generator early (e.g. on interrupt) stops the synthesizer. Raises
+    SpeechSynthesisError if the stream ends without all of the audio.
+    """
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            result = synthesizer.start_speaking_text_async(text).get()
+            if result.reason == speechsdk.ResultReason.Canceled:
+                details = result.cancellation_details
+                raise SpeechSynthesisError(f"Synthesis canceled: {details.reason} {details.error_details}")
+            stream = speechsdk.AudioDataStream(result)
+            while not stopped.is_set():
+                # read_data writes into the buffer in place, and a full-length
+                # slice of bytes is the same object, so each read needs its
+                # own buffer or queued chunks would be overwritten.
+                buffer = bytes(chunk_size)
+                filled = stream.read_data(buffer)
+                if filled == 0:
+                    break
+                loop.call_soon_threadsafe(chunks.put_nowait, buffer[:filled])
+            # read_data also returns 0 when synthesis was cancelled part-way.
+            if not stopped.is_set() and stream.status != speechsdk.StreamStatus.AllData:
+                details = stream.cancellation_details
+                raise SpeechSynthesisError(f"Synthesis ended early: {details.reason} {details.error_details}")
+        except Exception as e:
+            loop.call_soon_threadsafe(chunks.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(chunks.put_nowait, _END)
+
+    producer = loop.run_in_executor(_tts_executor, produce)
+    finished = False
+    try:
+        while True:
+            item = await chunks.get()
+            if item is _END:
+                finished = True
+                break
+            if isinstance(item, Exception):
+                # The producer has stopped reading; _END follows.
+                finished = True
+                raise item
+            yield item
+    finally:
+        # Only stop a synthesis the consumer abandoned. The producer future
+        # can still be pending just after _END, and a stop then would cut
+        # off the next sentence.
+        if not finished:
+            stopped.set()
+            # Fire-and-forget: unblocks the reader thread without waiting here.
+            synthesizer.stop_speaking_async()
+
+
+async def stop_speaking(synthesizer: speechsdk.SpeechSynthesizer):
+    """Stops any in-progress synthesis without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_tts_executor, lambda: synthesizer.stop_speaking_async().get())
+
+
+class SentenceSplitter:
+    """
+    Incrementally splits streamed text at sentence boundaries.
+    Fragments shorter than `min_chars` are held back and merged with the
+    next sentence so very short utterances ("Sure.") are not synthesized alone.
+    """
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _SENTENCE_BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return remainder or None
+
+
+async def split_sentences(text_stream: AsyncIterator[str], min_chars: int = 20) -> AsyncIterator[str]:
+    """Re-chunks a stream of text deltas into complete sentences."""
+    splitter = SentenceSplitter(min_chars=min_chars)
+    async for delta in text_stream:
+        for sentence in splitter.feed(delta):
+            yield sentence
+    remainder = splitter.flush()
+    if remainder:
+        yield remainder
+
+
+async def pipeline_synthesis(
+    synthesizer: speechsdk.SpeechSynthesizer,
+    sentences: AsyncIterator[str],
+    lookahead: int = TTS_LOOKAHEAD,
+    synthesize: Optional[Callable[[str], AsyncIterator[bytes]]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Synthesize sentences as they arrive and yield their audio in order.
+
+    A background task synthesizes sentence N+1 while the caller is still
+    sending sentence N, with at most `lookahead` sentences queued ahead.
+    Closing the generator (e.g. on barge-in) cancels the queued sentences
+    and stops the synthesizer. `synthesize(text)` defaults to
+    stream_synthesis on `synthesizer`.
+    """
+    if synthesize is None:
+        synthesize = lambda text: stream_synthesis(synthesizer, text)
+    pending: asyncio.Queue = asyncio.Queue(maxsize=lookahead)
+
+    async def produce():
+        try:
+            async for sentence in sentences:
+                audio: asyncio.Queue = asyncio.Queue()
+                await pending.put(audio)
+                try:
+                    async for chunk in synthesize(sentence):
+                        audio.put_nowait(chunk)
+                except Exception as e:
+                    audio.put_nowait(e)
+                finally:
+                    audio.put_nowait(_END)
+        except Exception as e:
+            failed: asyncio.Queue = asyncio.Queue()
+            failed.put_nowait(e)
+            await pending.put(failed)
+        # Not in a finally block: once cancelled, nobody is left to read the marker.
+        await pending.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            audio = await pending.get()
+            if audio is None:
+                break
+            while True:
+                item = await audio.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        producer.cancel()
+
+
+def default_recognizer_factory(
+    speech_config: speechsdk.SpeechConfig,
+    audio_config: speechsdk.audio.AudioConfig,
+) -> speechsdk.SpeechRecognizer:
+    return speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
+
+
+class RecognitionSession:
+    """
+    Per-connection speech recognition fed by audio from the client.
+
+    PCM frames received over the WebSocket are queued (at most
+    `max_buffered_frames`) and written to an Azure push audio input stream
+    by a background task. feed() waits while the queue is full, which pauses
+    the WebSocket reader and pushes backpressure to the client. The
+    recognizer is created, started and stopped with the session;
+    `recognizer_factory(speech_config, audio_config)` can be replaced with a
+    fake in tests.
+    """
+
+    def __init__(
+        self,
+        speech_config: speechsdk.SpeechConfig,
+        on_recognized: Callable,
+        sample_rate: int = AUDIO_SAMPLE_RATE,
+        max_buffered_frames: int = AUDIO_MAX_BUFFERED_FRAMES,
+        recognizer_factory: Callable = default_recognizer_factory,
+    ):
+        self.speech_config = speech_config
+        self.on_recognized = on_recognized
+        self.sample_rate = sample_rate
+        self.recognizer_factory = recognizer_factory
+        self._frames: asyncio.Queue = asyncio.Queue(maxsize=max_buffered_frames)
+        self._push_stream = None
+        self._recognizer = None
+        self._writer: Optional[asyncio.Task] = None
+        self.frames_received = 0
+        self.bytes_received = 0
+        self.backpressure_waits = 0
+
+    async def start(self):
+        stream_format = speechsdk.audio.AudioStreamFormat(
+            samples_per_second=self.sample_rate,
+            bits_per_sample=16,
+            channels=1
+        )
+        self._push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+        audio_config = speechsdk.audio.AudioConfig(stream=self._push_stream)
+        self._recognizer = self.recognizer_factory(self.speech_config, audio_config)
+        self._recognizer.recognized.connect(self.on_recognized)
+        self._writer = asyncio.create_task(self._write_frames())
+        await asyncio.to_thread(lambda: self._recognizer.start_continuous_recognition_async().get())
+
+    async def feed(self, frame: bytes):
+        """Queues one PCM frame, waiting while the buffer is full."""
+        if not frame:
+            return
+        if self._frames.full():
+            self.backpressure_waits += 1
+        await self._frames.put(frame)
+        self.frames_received += 1
+        self.bytes_received += len(frame)
+
+    async def _write_frames(self):
+        while True:
+            frame = await self._frames.get()
+            if frame is None:
+                break
+            await asyncio.to_thread(self._push_stream.write, frame)
+
+    async def close(self):
+        """Flushes buffered audio, ends the stream and stops the recognizer."""
+        if self._writer is not None and not self._writer.done():
+            await self._frames.put(None)
+            await self._writer
+        if self._push_stream is not None:
+            self._push_stream.close()
+        if self._recognizer is not None:
+            await asyncio.to_thread(lambda: self._recognizer.stop_continuous_recognition_async().get())
+            self._recognizer = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "frames_received": self.frames_received,
+            "bytes_received": self.bytes_received,
+            "buffered_frames": self._frames.qsize(),
+            "backpressure_waits": self.backpressure_waits
+        }
+
+
+def _transcribe_pcm_sync(speech_config: speechsdk.SpeechConfig, pcm: bytes, sample_rate: int) -> str:
+    stream_format = speechsdk.audio.AudioStreamFormat(
+        samples_per_second=sample_rate,
+        bits_per_sample=16,
+        channels=1
+    )
+    push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+    recognizer = speechsdk.SpeechRecognizer(
+        speech_config=speech_config,
+        audio_config=speechsdk.audio.AudioConfig(stream=push_stream)
+    )
+    texts = []
+    done = threading.Event()
+    recognizer.recognized.connect(lambda evt: evt.result.text and texts.append(evt.result.text))
+    recognizer.session_stopped.connect(lambda evt: done.set())
+    recognizer.canceled.connect(lambda evt: done.set())
+    recognizer.start_continuous_recognition_async().get()
+    push_stream.write(pcm)
+    push_stream.close()
+    done.wait(timeout=max(30.0, 2 * len(pcm) / (2 * sample_rate)))
+    recognizer.stop_continuous_recognition_async().get()
+    return " ".join(texts)
+
+
+async def transcribe_pcm(speech_config: speechsdk.SpeechConfig, pcm: bytes, sample_rate: int) -> str:
+    """Transcribes one segment of 16-bit mono PCM without blocking the event loop."""
+    return await asyncio.to_thread(_transcribe_pcm_sync, speech_config, pcm, sample_rate)
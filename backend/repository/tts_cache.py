@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Iterable
+
+import azure.cognitiveservices.speech as speechsdk
+
+from repository.speech import stream_synthesis, TTS_CHUNK_SIZE
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".tts_cache"))
+TTS_CACHE_MAX_DISK_BYTES = int(os.getenv("TTS_CACHE_MAX_DISK_BYTES", 512 * 1024 * 1024))
+TTS_CACHE_MAX_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MAX_MEMORY_BYTES", 32 * 1024 * 1024))
+# Only entries up to this size are promoted into the in-memory hot tier.
+TTS_CACHE_HOT_ENTRY_BYTES = int(os.getenv("TTS_CACHE_HOT_ENTRY_BYTES", 256 * 1024))
+
+
+class TTSCache:
+    """
+    Content-addressed store for synthesized audio.
+
+    Entries are keyed by SHA-256 of (voice name, output format, text) and
+    stored as one file per digest, which can also be served over HTTP with
+    sendfile. Small, recently used entries are also kept in an in-memory
+    hot tier. Both tiers are size-bounded with LRU eviction.
+    """
+
+    def __init__(
+        self,
+        directory: str = TTS_CACHE_DIR,
+        max_disk_bytes: int = TTS_CACHE_MAX_DISK_BYTES,
+        max_memory_bytes: int = TTS_CACHE_MAX_MEMORY_BYTES,
+        hot_entry_bytes: int = TTS_CACHE_HOT_ENTRY_BYTES,
+    ):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.hot_entry_bytes = hot_entry_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # digest -> size on disk, least recently used first
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._load_index()
+
+    @staticmethod
+    def key(voice_name: str, output_format: str, text: str) -> str:
+        payload = "\x1f".join([voice_name, output_format, text.strip()])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.audio")
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".audio"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append((stat.st_mtime, name[:-len(".audio")], stat.st_size))
+        for _, digest, size in sorted(entries):
+            self._disk[digest] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def get(self, digest: str):
+        """
+        Returns the audio as bytes (hot tier or a small disk entry), an open
+        binary file for a larger disk entry, or None. The caller must close
+        a returned file.
+        """
+        audio = self._memory.get(digest)
+        if audio is not None:
+            self._memory.move_to_end(digest)
+            self.memory_hits += 1
+            return audio
+        if digest not in self._disk:
+            self.misses += 1
+            return None
+        try:
+            f = open(self.path(digest), "rb")
+        except OSError as e:
+            logging.error(f"TTS cache read failed for {digest}: {str(e)}")
+            self._forget_disk(digest)
+            self.misses += 1
+            return None
+        self._disk.move_to_end(digest)
+        try:
+            # File mtime carries the LRU order across restarts.
+            os.utime(self.path(digest))
+        except OSError:
+            pass
+        self.disk_hits += 1
+        if self._disk[digest] <= self.hot_entry_bytes:
+            with f:
+                audio = f.read()
+            self._remember(digest, audio)
+            return audio
+        return f
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._memory or digest in self._disk
+
+    def _remember(self, digest: str, audio: bytes):
+        if digest in self._memory:
+            self._memory_bytes -= len(self._memory.pop(digest))
+        self._memory[digest] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _write(self, digest: str, audio: bytes):
+        tmp_path = self.path(digest) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, self.path(digest))
+
+    async def put(self, digest: str, audio: bytes):
+        if not audio:
+            return
+        if len(audio) <= self.hot_entry_bytes:
+            self._remember(digest, audio)
+        try:
+            await asyncio.to_thread(self._write, digest, audio)
+        except OSError as e:
+            logging.error(f"TTS cache write failed for {digest}: {str(e)}")
+            return
+        self._forget_disk(digest, unlink=False)
+        self._disk[digest] = len(audio)
+        self._disk_bytes += len(audio)
+        self._evict_disk()
+
+    def _forget_disk(self, digest: str, unlink: bool = True):
+        size = self._disk.pop(digest, None)
+        if size is not None:
+            self._disk_bytes -= size
+        if unlink:
+            try:
+                os.remove(self.path(digest))
+            except OSError:
+                pass
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            digest = next(iter(self._disk))
+            self._forget_disk(digest)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses
+        }
+
+
+tts_cache = TTSCache()
+
+
+async def cached_synthesis(
+    synthesizer: speechsdk.SpeechSynthesizer,
+    text: str,
+    voice_name: str,
+    output_format: str,
+    cache: TTSCache = tts_cache,
+    chunk_size: int = TTS_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Like stream_synthesis, but serves previously synthesized text from the
+    cache and stores completed syntheses for next time. In-memory hits are
+    yielded as memoryview slices; larger disk hits are read from the file
+    one chunk at a time.
+    """
+    digest = cache.key(voice_name, output_format, text)
+    audio = cache.get(digest)
+    if isinstance(audio, bytes):
+        view = memoryview(audio)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+        return
+    if audio is not None:
+        with audio:
+            while True:
+                chunk = audio.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        return
+
+    parts = []
+    async for chunk in stream_synthesis(synthesizer, text, chunk_size=chunk_size):
+        parts.append(chunk)
+        yield chunk
+    # stream_synthesis raises unless the stream reported all of the audio, and
+    # an interrupted consumer never gets here, so only complete audio is cached.
+    await cache.put(digest, b"".join(parts))
+
+
+async def warm_up(
+    synthesizer: speechsdk.SpeechSynthesizer,
+    phrases: Iterable[str],
+    voice_name: str,
+    output_format: str,
+    cache: TTSCache = tts_cache,
+):
+    """Synthesizes any of `phrases` not already cached."""
+    for phrase in phrases:
+        digest = cache.key(voice_name, output_format, phrase)
+        if digest in cache:
+            continue
+        try:
+            async for _ in cached_synthesis(synthesizer, phrase, voice_name, output_format, cache=cache):
+                pass
+        except Exception as e:
+            logging.error(f"TTS warm-up failed for {phrase!r}: {str(e)}")
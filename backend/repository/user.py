@@ -1,21 +1,21 @@
 # repository/user.py
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 import schemas
 import models
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from routes.hashing import Hash, HashingOverloadedError, overloaded_response
 
 async def create(request: schemas.User, db: AsyncSession):
     try:
-        hashed_password = pwd_context.hash(request.password)
+        hashed_password = await Hash.bcrypt(request.password)
         new_user = models.User(name=request.name, email=request.email, password=hashed_password)
         db.add(new_user)
         await db.commit()         # Await the commit
         await db.refresh(new_user)  # Await the refresh
         return new_user
+    except HashingOverloadedError:
+        raise overloaded_response()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
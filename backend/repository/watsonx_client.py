@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Credentials have no defaults; they must come from the environment.
+WATSONX_API_KEY = os.getenv("WATSONX_API_KEY")
+WATSONX_URL = os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com")
+WATSONX_PROJECT_ID = os.getenv("WATSONX_PROJECT_ID")
+WATSONX_MODEL_ID = os.getenv("WATSONX_MODEL_ID", "mistralai/mixtral-8x7b-instruct-v01")
+WATSONX_POOL_SIZE = int(os.getenv("WATSONX_POOL_SIZE", 4))
+# IAM access tokens are valid for 60 minutes; rebuild clients before that.
+WATSONX_REFRESH_SECONDS = float(os.getenv("WATSONX_REFRESH_SECONDS", 50 * 60))
+
+
+_END = object()
+
+
+class WatsonxConfigError(Exception):
+    pass
+
+
+class _PooledModel:
+    def __init__(self, model_inference):
+        self.model_inference = model_inference
+        self.created_at = time.monotonic()
+
+
+class WatsonxPool:
+    """
+    Long-lived pool of Watsonx ModelInference clients.
+
+    Clients are created once per process (including the IAM credential
+    exchange) and reused across calls. Generation runs on a dedicated
+    executor with one thread per pooled client, so Watsonx calls never
+    compete with the default executor. Clients older than `refresh_seconds`,
+    or whose last call failed, are rebuilt to pick up a fresh IAM token.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = WATSONX_POOL_SIZE,
+        refresh_seconds: float = WATSONX_REFRESH_SECONDS,
+        model_id: str = WATSONX_MODEL_ID,
+    ):
+        self.pool_size = pool_size
+        self.refresh_seconds = refresh_seconds
+        self.model_id = model_id
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="watsonx")
+        # Idle clients; None marks a slot whose client is built on checkout.
+        self._idle: "queue.Queue" = queue.Queue()
+        self._started = False
+        self._start_lock = threading.Lock()
+        # Latency metrics (seconds)
+        self.calls = 0
+        self.errors = 0
+        self.rebuilds = 0
+        self._latencies: deque = deque(maxlen=500)
+
+    def _build(self) -> _PooledModel:
+        missing = [name for name, value in (
+            ("WATSONX_API_KEY", WATSONX_API_KEY),
+            ("WATSONX_PROJECT_ID", WATSONX_PROJECT_ID),
+        ) if not value]
+        if missing:
+            raise WatsonxConfigError(f"Watsonx is not configured: set {', '.join(missing)}")
+
+        from ibm_watsonx_ai import Credentials
+        from ibm_watsonx_ai.foundation_models import ModelInference
+        from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
+        from ibm_watsonx_ai.foundation_models.utils.enums import DecodingMethods
+
+        gen_params = {
+            GenParams.DECODING_METHOD: DecodingMethods.GREEDY,
+            GenParams.TEMPERATURE: 0.8,
+            GenParams.MIN_NEW_TOKENS: 10,
+            GenParams.MAX_NEW_TOKENS: 1024
+        }
+        model_inference = ModelInference(
+            model_id=self.model_id,
+            params=gen_params,
+            credentials=Credentials(api_key=WATSONX_API_KEY, url=WATSONX_URL),
+            project_id=WATSONX_PROJECT_ID
+        )
+        return _PooledModel(model_inference)
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._started:
+                return
+            # Slots start empty and are built on first checkout.
+            for _ in range(self.pool_size):
+                self._idle.put(None)
+            self._started = True
+
+    def _checkout(self) -> _PooledModel:
+        self._ensure_started()
+        pooled = self._idle.get()
+        if pooled is None or time.monotonic() - pooled.created_at > self.refresh_seconds:
+            try:
+                pooled = self._build()
+            except Exception:
+                self._idle.put(None)
+                raise
+            self.rebuilds += 1
+        return pooled
+
+    def _generate_sync(self, prompt: str) -> List[str]:
+        pooled = self._checkout()
+        try:
+            response = pooled.model_inference.generate(prompt)
+        except Exception:
+            # Drop the client; the next checkout rebuilds it with fresh credentials.
+            pooled = None
+            raise
+        finally:
+            self._idle.put(pooled)
+        results = response.get('results', [])
+        return [item.get('generated_text') for item in results if item.get('generated_text')]
+
+    def _stream_sync(self, prompt: str, emit, stopped: threading.Event):
+        pooled = self._checkout()
+        try:
+            for delta in pooled.model_inference.generate_text_stream(prompt=prompt):
+                if stopped.is_set():
+                    break
+                if delta:
+                    emit(delta)
+        except Exception:
+            pooled = None
+            raise
+        finally:
+            self._idle.put(pooled)
+
+    async def generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Yields generated text deltas as Watsonx streams them. Closing the
+        generator early stops reading and returns the client to the pool.
+        """
+        loop = asyncio.get_running_loop()
+        deltas: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def run():
+            try:
+                self._stream_sync(prompt, lambda d: loop.call_soon_threadsafe(deltas.put_nowait, d), stopped)
+            except Exception as e:
+                loop.call_soon_threadsafe(deltas.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(deltas.put_nowait, _END)
+
+        started = time.perf_counter()
+        loop.run_in_executor(self._executor, run)
+        try:
+            while True:
+                item = await deltas.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    self.errors += 1
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+            self.calls += 1
+            self._latencies.append(time.perf_counter() - started)
+
+    def _warm_sync(self):
+        self._idle.put(self._checkout())
+
+    async def start(self):
+        """Builds one client up front so the first utterance skips setup cost."""
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._warm_sync)
+        except Exception as e:
+            logging.error(f"Watsonx warm-up failed: {str(e)}")
+
+    async def generate(self, prompt: str) -> List[str]:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, self._generate_sync, prompt)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.calls += 1
+            self._latencies.append(time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, float]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "pool_size": self.pool_size,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rebuilds": self.rebuilds,
+            "p50_seconds": percentile(0.5),
+            "p95_seconds": percentile(0.95),
+            "max_seconds": latencies[-1] if latencies else 0.0
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+watsonx_pool = WatsonxPool()
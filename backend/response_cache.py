@@ -0,0 +1,162 @@
+# response_cache.py
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+from typing import Dict, Optional
+
+from cache import LRUCache
+from config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_PATH, RESPONSE_CACHE_DISK_SIZE
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?,;:]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Collapses runs of whitespace so near-identical inputs share a key. Case is kept."""
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+def normalize_user_input(text: str) -> str:
+    return _TRAILING_PUNCTUATION.sub("", normalize_text(text).lower())
+
+
+def make_cache_key(model: str, system_prompt: str, user_input: str, temperature: float) -> str:
+    """Digest of the normalized (model, system_prompt, user input, temperature) tuple."""
+    payload = json.dumps([
+        model,
+        normalize_text(system_prompt),
+        normalize_user_input(user_input),
+        round(float(temperature), 3)
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """
+    Optional SQLite-backed second tier so cached responses survive restarts.
+    Entries carry a wall-clock expiry; the table is trimmed to max_entries.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_expires_at ON responses (expires_at)")
+        self._conn.commit()
+        self._lock = asyncio.Lock()
+
+    def _get(self, key: str):
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        return value, remaining
+
+    def _set(self, key: str, value: str, ttl: float):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl)
+        )
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self._conn.commit()
+
+    async def get(self, key: str):
+        async with self._lock:
+            return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: float):
+        async with self._lock:
+            await asyncio.to_thread(self._set, key, value, ttl)
+
+    def close(self):
+        self._conn.close()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for coach completions: a bounded in-memory LRU with TTL,
+    backed by an optional on-disk tier.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = RESPONSE_CACHE_SIZE,
+        default_ttl: float = RESPONSE_CACHE_TTL,
+        disk_path: Optional[str] = RESPONSE_CACHE_PATH,
+        disk_size: int = RESPONSE_CACHE_DISK_SIZE,
+    ):
+        self.default_ttl = default_ttl
+        self.memory = LRUCache(maxsize=maxsize, ttl=default_ttl)
+        self.disk = None
+        self.disk_hits = 0
+        # Lookups that missed both tiers
+        self.misses = 0
+        if disk_path:
+            try:
+                self.disk = DiskTier(disk_path, disk_size)
+            except sqlite3.Error as e:
+                logging.error(f"Response cache disk tier disabled: {str(e)}")
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        entry = None
+        if self.disk is not None:
+            try:
+                entry = await self.disk.get(key)
+            except sqlite3.Error as e:
+                logging.error(f"Response cache disk read failed: {str(e)}")
+        if entry is None:
+            self.misses += 1
+            return None
+        value, remaining = entry
+        # Promote to the memory tier for the rest of its lifetime.
+        self.memory.set(key, value, ttl=remaining)
+        self.disk_hits += 1
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self.memory.set(key, value, ttl=ttl)
+        if self.disk is not None:
+            try:
+                await self.disk.set(key, value, ttl)
+            except sqlite3.Error as e:
+                logging.error(f"Response cache disk write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        stats = self.memory.stats()
+        # The memory tier's own count includes lookups answered from disk.
+        stats["misses"] = self.misses
+        stats["disk_hits"] = self.disk_hits
+        stats["disk_enabled"] = self.disk is not None
+        return stats
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+
+# Shared cache for coach completions.
+response_cache = ResponseCache()
@@ -1,9 +1,13 @@
 from datetime import datetime, timedelta, timezone
+import hashlib
+import time
 import jwt
 from jwt.exceptions import InvalidTokenError
 from fastapi.security import OAuth2PasswordBearer
 import schemas
 from fastapi import HTTPException
+from cache import LRUCache
+from config import TOKEN_CACHE_SIZE
 
 
 
@@ -17,6 +21,41 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 
 
+class TokenVerifier:
+    """
+    Verifies JWTs and remembers the decoded claims of tokens that already
+    passed verification. Entries are keyed by a SHA-256 digest of the token
+    and expire at the token's own `exp`, so a cached token is never accepted
+    past its expiry. Failed verifications are not cached.
+    """
+
+    # Upper bound on how long a token without an `exp` claim stays cached.
+    MAX_TTL = 300
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self._cache = LRUCache(maxsize=maxsize)
+
+    def decode(self, token: str) -> dict:
+        """Returns the token's claims. Raises InvalidTokenError if verification fails."""
+        if not token:
+            raise InvalidTokenError("No token provided")
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        payload = self._cache.get(key)
+        if payload is None:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            exp = payload.get("exp")
+            ttl = exp - time.time() if exp is not None else self.MAX_TTL
+            if ttl > 0:
+                self._cache.set(key, payload, ttl=ttl)
+        return dict(payload)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+token_verifier = TokenVerifier()
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     
@@ -27,7 +66,7 @@ def create_access_token(data: dict):
 
 def verify_token(token: str, credentials_exception: HTTPException):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_verifier.decode(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -2,15 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.future import select
+from sqlalchemy import update
 from repository.social_clients import SocialMediaManager
 from database import get_db
-from routes.oauth2 import get_current_user
+from routes.oauth2 import get_current_user, invalidate_user
 from fastapi.responses import HTMLResponse
 from typing import Dict
 
 import database, models
-from .auth_token import create_access_token, verify_token, SECRET_KEY, ALGORITHM
-from .hashing import Hash
+from .auth_token import create_access_token, verify_token, token_verifier
+from .hashing import Hash, HashingOverloadedError, overloaded_response
 from schemas import Token
 from . import oauth2
 import jwt
@@ -35,7 +36,7 @@ async def login(
                 detail="Invalid Credentials"
             )
             
-        if not Hash.verify(user.password, request.password):
+        if not await Hash.verify(user.password, request.password):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Incorrect password"
@@ -53,6 +54,8 @@ async def login(
                 "email": user.email
             }
         }
+    except HashingOverloadedError:
+        raise overloaded_response()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -99,7 +102,7 @@ async def facebook_auth(
         print(token)
         try:
             # Verify token and get user email
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = token_verifier.decode(token)
             email = payload.get("sub")
             if not email:
                 raise HTTPException(status_code=401, detail="Invalid token")
@@ -151,7 +154,7 @@ async def facebook_callback(
         
         try:
             # Verify the token
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = token_verifier.decode(token)
             email = payload.get("sub")
             if not email:
                 raise HTTPException(status_code=401, detail="Invalid token")
@@ -168,6 +171,7 @@ async def facebook_callback(
             # Update user's Facebook token
             user.facebook_token = token_data["access_token"]
             await db.commit()
+            invalidate_user(email)
             
             return HTMLResponse(content=f"""
                 <script>
@@ -199,7 +203,7 @@ async def facebook_callback(
 
 async def get_user_from_token(token: str, db: AsyncSession):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_verifier.decode(token)
         email = payload.get("sub")
         if not email:
             return None
@@ -229,9 +233,15 @@ async def facebook_status(
                     "message": "Facebook connected"
                 }
             except:
-                # Token is invalid, clear it
-                current_user.facebook_token = None
+                # Token is invalid, clear it. current_user may be a cached,
+                # detached instance, so write through an explicit UPDATE.
+                await db.execute(
+                    update(models.User)
+                    .where(models.User.id == current_user.id)
+                    .values(facebook_token=None)
+                )
                 await db.commit()
+                invalidate_user(current_user.email)
                 return {
                     "connected": False,
                     "message": "Facebook token expired. Please reconnect."
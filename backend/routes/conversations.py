@@ -0,0 +1,88 @@
+# conversations.py
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import datetime, timezone
+
+import schemas
+from database import get_db, get_conversation_logs_page, stream_conversation_logs
+from exporters import to_ndjson, to_csv, gzip_stream
+from .oauth2 import get_current_user
+
+router = APIRouter(
+    tags=['Conversations'],
+    prefix="/conversations",
+)
+
+def ensure_own_logs(user_id: str, current_user):
+    """
+    Conversation logs are saved under str(user.id) for authenticated voice
+    sessions (/ws/voice?token=...); only the owner may read them.
+    """
+    if user_id != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to read another user's conversations"
+        )
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC; aware query values are converted to match."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+EXPORT_FORMATS = {
+    "ndjson": (to_ndjson, "application/x-ndjson"),
+    "csv": (to_csv, "text/csv"),
+}
+
+# Declared before /{user_id} so "export" is not captured as a user id
+@router.get('/export')
+async def export_conversations(
+    user_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: str = "ndjson",
+    gzip: bool = False,
+    current_user = Depends(get_current_user)
+):
+    """Stream the current user's conversation logs, optionally for a date range, as NDJSON or CSV."""
+    if user_id is None:
+        user_id = str(current_user.id)
+    ensure_own_logs(user_id, current_user)
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format: {format}"
+        )
+    # Checked here: once the response has started, errors can only truncate it.
+    start, end = naive_utc(start), naive_utc(end)
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    encoder, media_type = EXPORT_FORMATS[format]
+    body = encoder(stream_conversation_logs(user_id=user_id, start=start, end=end))
+    headers = {"Content-Disposition": f'attachment; filename="conversations.{format}"'}
+    if gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+@router.get('/{user_id}', response_model=schemas.ConversationPage)
+async def get_conversation_history(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Page through a user's conversation logs, newest first. Pass next_cursor back to continue."""
+    ensure_own_logs(user_id, current_user)
+    try:
+        items, next_cursor = await get_conversation_logs_page(user_id, limit=limit, cursor=cursor, session=db)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
@@ -1,11 +1,96 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from config import HASH_WORKERS, HASH_MAX_PENDING, HASH_RETRY_AFTER
+
 pwd_cxt = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+
+class HashingOverloadedError(Exception):
+    pass
+
+
+def overloaded_response() -> HTTPException:
+    """503 for a request turned away by a full hashing queue."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry shortly",
+        headers={"Retry-After": str(HASH_RETRY_AFTER)}
+    )
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated thread pool so hashing never blocks the event
+    loop. At most `workers` hashes run at once; further callers wait on a
+    semaphore and are counted as queued. Once every worker is busy and
+    `max_pending` callers are already waiting, new requests are rejected
+    with HashingOverloadedError.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._semaphore = asyncio.Semaphore(workers)
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self._total_seconds = 0.0
+
+    async def _run(self, fn, *args):
+        # Only callers that would have to wait count against max_pending.
+        if self._semaphore.locked() and self.queued >= self.max_pending:
+            self.rejected += 1
+            raise HashingOverloadedError("Password hashing queue is full")
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.active += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.active -= 1
+            self.completed += 1
+            self._total_seconds += time.perf_counter() - started
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_cxt.hash, password)
+
+    async def verify(self, hashed_password: str, plain_password: str) -> bool:
+        return await self._run(pwd_cxt.verify, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "active": self.active,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_seconds": self._total_seconds / self.completed if self.completed else 0.0
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+password_hasher = PasswordHasher()
+
+
 class Hash():
-    def bcrypt(password: str):
-        return pwd_cxt.hash(password)
+    async def bcrypt(password: str):
+        return await password_hasher.hash(password)
 
-    def verify(hashed_password,plain_password):
-        return pwd_cxt.verify(plain_password,hashed_password)
-    
\ No newline at end of file
+    async def verify(hashed_password,plain_password):
+        return await password_hasher.verify(hashed_password, plain_password)
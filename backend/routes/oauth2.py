@@ -5,12 +5,22 @@ from database import get_db
 from . import auth_token
 from sqlalchemy.future import select
 import models
-import jwt
-from .auth_token import SECRET_KEY, ALGORITHM
+from .auth_token import token_verifier
+from cache import LRUCache
+from config import USER_CACHE_SIZE, USER_CACHE_TTL
 
 # Set auto_error to False so we can customize the error message
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 
+# Authenticated users keyed by email, so hot endpoints skip the DB lookup.
+# Entries are detached ORM objects; writers must call invalidate_user().
+user_cache = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def invalidate_user(email: str):
+    """Drop a cached user after its row has been written."""
+    user_cache.pop(email)
+
 async def get_current_user(
        token: str = Depends(oauth2_scheme),
        db: AsyncSession = Depends(get_db)
@@ -25,6 +35,10 @@ async def get_current_user(
        try:
            payload = auth_token.verify_token(token, credentials_exception)
            email: str = payload.get("sub")
+           user = user_cache.get(email)
+           if user is not None:
+               return user
+
            result = await db.execute(
                select(models.User).filter(models.User.email == email)
            )
@@ -33,6 +47,7 @@ async def get_current_user(
            if user is None:
                raise credentials_exception
                
+           user_cache.set(email, user)
            return user
        except Exception as e:
            print(f"Authentication error: {str(e)}")
@@ -43,7 +58,7 @@ async def get_current_token(
     token: str = Depends(oauth2_scheme)
 ) -> str:
     try:
-        jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_verifier.decode(token)
         return token
     except:
         raise HTTPException(
@@ -1,96 +1,143 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, status, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
+from datetime import timezone
+import json
 
-from schemas import SocialPostRequest, SocialPostResponse, ImageSearchResult
-from database import get_db
+from schemas import (
+    SocialPostRequest,
+    ImageSearchResult,
+    SEOBatchRequest,
+    SEOBatchResponse,
+    PostJobAccepted,
+    PostJobStatus,
+    ScheduledPostCreate,
+    ScheduledPostOut,
+    ScheduledPostPage,
+)
+from config import SEO_BATCH_MAX_ITEMS, POST_JOB_POLL_INTERVAL
+from database import get_db, async_session, get_scheduled_posts_page
+from models import ScheduledPost
 from .oauth2 import get_current_user
 from repository.unsplash_client import search_images, get_image_by_id
-from repository.seo_langgraph import optimize_content_for_seo
-from repository.social_clients import SocialMediaManager
+from repository.seo_langgraph import optimize_contents_for_seo, stream_content_for_seo
+from repository.post_jobs import post_job_queue, job_status, social_manager, TERMINAL_STATUSES
+from repository.scheduler import post_scheduler
 
 router = APIRouter(tags=["Social Post"], prefix="/social_post")
-social_manager = SocialMediaManager()
 
-@router.post("/", response_model=SocialPostResponse)
+@router.post("/", response_model=PostJobAccepted, status_code=status.HTTP_202_ACCEPTED)
 async def create_social_post(
-    request: Request,
     post: SocialPostRequest,
-    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    # print(f"Current user: {current_user}")  # Log the current user
+    """
+    Queue a post for SEO optimization and publishing. Returns a job id right
+    away; follow progress at GET /social_post/jobs/{job_id} or over the
+    /social_post/jobs/{job_id}/ws WebSocket.
+    """
     try:
-        print("Debug - Headers:", request.headers)
-        # print("Debug - Current user:", current_user)
-        print("Debug - Post content:", post.dict())
-        
-        # Check if user is authenticated and has Facebook token
-        # if not current_user:
-        #     raise HTTPException(
-        #         status_code=status.HTTP_401_UNAUTHORIZED,
-        #         detail="Not authenticated"
-        #     )
-        
-        # if not current_user.facebook_token:
-        #     raise HTTPException(
-        #         status_code=status.HTTP_400_BAD_REQUEST,
-        #         detail="Facebook not connected. Please connect Facebook first."
-        #     )
+        job_id = await post_job_queue.enqueue(current_user.id, post.dict())
+    except Exception as e:
+        print("Debug - General error:", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/social_post/jobs/{job_id}"
+    }
 
-        # First, optimize the content using SEO LangGraph
-        optimized_content = await optimize_content_for_seo(post.content)
-        print("Debug - Optimized content:", optimized_content)
-        
-        # Check if 'seo_content' is in the optimized content
-        if 'seo_content' not in optimized_content:
-            raise HTTPException(status_code=400, detail="SEO content not generated")
-        
-        # Create the post with optimized content
-        post_data = {
-            "content": optimized_content["seo_content"],
-            "facebook_content": optimized_content["facebook_content"],
-            "hashtags": optimized_content["hashtags"],
-            "meta_description": optimized_content["meta_description"],
-            "image_alt": optimized_content["image_alt"]
-        }
+@router.get("/jobs/{job_id}", response_model=PostJobStatus)
+async def get_post_job(
+    job_id: str,
+    current_user = Depends(get_current_user)
+):
+    """Status of a queued post; `result` is set once the job has finished"""
+    job = await post_job_queue.get(job_id)
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job_status(job)
 
-        # If there's an Unsplash image ID, get the full image URL
-        if post.unsplash_image_id:
-            image_url = await get_image_by_id(post.unsplash_image_id)
-            if image_url:
-                post_data["image_url"] = image_url
-        
-        # Post to Facebook with optimized content
-        fb_result = await social_manager.post_to_facebook(
-            content=post_data["facebook_content"],
-            image_url=post_data.get("image_url"),
-            hashtags=post_data["hashtags"],
-            facebook_token=current_user.facebook_token
-        )
+@router.websocket("/jobs/{job_id}/ws")
+async def watch_post_job(websocket: WebSocket, job_id: str, token: str = ""):
+    """
+    Pushes the job's status (same body as GET /jobs/{job_id}) whenever it
+    changes, and closes once the job has finished. Browsers cannot set an
+    Authorization header on WebSockets, so the access token is passed as ?token=.
+    """
+    await websocket.accept()
+    try:
+        async with async_session() as db:
+            current_user = await get_current_user(token=token, db=db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
 
-        return {
-            "success": fb_result["success"],
-            "fb_status": fb_result["status"],
-            "post_url": fb_result.get("post_url"),
-            "optimized_content": {
-                "original": post.content,
-                "seo_optimized": post_data["seo_content"],
-                "hashtags": post_data["hashtags"],
-                "meta_description": post_data["meta_description"]
-            }
-        }
+    try:
+        last_sent = None
+        while True:
+            job = await post_job_queue.get(job_id)
+            if job is None or job.user_id != current_user.id:
+                await websocket.send_json({"job_id": job_id, "error": "Job not found"})
+                break
+            body = jsonable_encoder(job_status(job))
+            if body != last_sent:
+                await websocket.send_json(body)
+                last_sent = body
+            if job.status in TERMINAL_STATUSES:
+                break
+            # Woken by local status changes; the timeout covers jobs run by other processes.
+            await post_job_queue.wait_for_change(job_id, timeout=POST_JOB_POLL_INTERVAL)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
 
-    except HTTPException as http_ex:
-        raise http_ex  # Re-raise HTTP exceptions
+@router.post("/seo/batch", response_model=SEOBatchResponse)
+async def optimize_seo_batch(
+    batch: SEOBatchRequest,
+    current_user = Depends(get_current_user)
+):
+    """Optimize several drafts in one request (results are in request order)"""
+    if not batch.contents:
+        return {"results": []}
+    if len(batch.contents) > SEO_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {SEO_BATCH_MAX_ITEMS} drafts per batch"
+        )
+    try:
+        return {"results": await optimize_contents_for_seo(batch.contents)}
     except Exception as e:
-        print("Debug - General error:", str(e))
-        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            detail=f"Error optimizing content: {str(e)}"
         )
 
+@router.post("/seo/stream")
+async def stream_seo(
+    post: SocialPostRequest,
+    current_user = Depends(get_current_user)
+):
+    """
+    Server-sent events for one draft: a `section` event per optimized
+    section as soon as it is complete, then a `done` event with the full
+    result (an `error` event precedes the fallback result on failure).
+    """
+    async def events():
+        async for event, data in stream_content_for_seo(post.content):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/auth/facebook")
 async def get_facebook_auth(current_user = Depends(get_current_user)):
     """Get Facebook authentication URL"""
@@ -126,29 +173,57 @@ async def search_images_endpoint(
             detail=f"Error searching images: {str(e)}"
         )
 
-# @router.get("/scheduled")
-# async def get_scheduled_posts(
-#     db: AsyncSession = Depends(get_db),
-#     current_user = Depends(get_current_user)
-# ):
-#     print(f"Current user: {current_user}")  # Log the current user
+def scheduled_post_out(post: ScheduledPost) -> dict:
+    return {
+        "id": post.id,
+        "content": post.content,
+        "image_url": post.image_url,
+        "hashtags": json.loads(post.hashtags) if post.hashtags else [],
+        "scheduled_time": post.due_at,
+        "status": post.status,
+        "post_url": post.post_url,
+        "error": post.error,
+        "published_at": post.published_at
+    }
 
-#     """Get all scheduled posts for the current user"""
-#     try:
-#         # For now, return an empty list since we haven't implemented scheduling yet
-#         return {
-#             "posts": [
-#                 # Example structure of what we'll return later
-#                 # {
-#                 #     "content": "Sample post content",
-#                 #     "image_url": "https://example.com/image.jpg",
-#                 #     "scheduled_time": "2024-03-20T15:00:00Z",
-#                 #     "facebook_status": True
-#                 # }
-#             ]
-#         }
-#     except Exception as e:
-#         raise HTTPException(
-#             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-#             detail=str(e)
-#         )
+@router.post("/scheduled", response_model=ScheduledPostOut, status_code=status.HTTP_201_CREATED)
+async def schedule_post(
+    post: ScheduledPostCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Schedule a post to be published to Facebook at scheduled_time"""
+    due_at = post.scheduled_time
+    if due_at.tzinfo is not None:
+        # Stored as naive UTC like every other timestamp
+        due_at = due_at.astimezone(timezone.utc).replace(tzinfo=None)
+    image_url = post.image_url
+    if post.unsplash_image_id:
+        image_url = await get_image_by_id(post.unsplash_image_id) or image_url
+
+    scheduled = ScheduledPost(
+        user_id=current_user.id,
+        content=post.content,
+        image_url=image_url,
+        hashtags=json.dumps(post.hashtags),
+        due_at=due_at,
+        status="scheduled"
+    )
+    db.add(scheduled)
+    await db.commit()
+    post_scheduler.schedule(scheduled.id, scheduled.due_at)
+    return scheduled_post_out(scheduled)
+
+@router.get("/scheduled", response_model=ScheduledPostPage)
+async def get_scheduled_posts(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Page through the current user's scheduled posts, soonest first. Pass next_cursor back to continue."""
+    try:
+        posts, next_cursor = await get_scheduled_posts_page(current_user.id, limit=limit, cursor=cursor, session=db)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"posts": [scheduled_post_out(post) for post in posts], "next_cursor": next_cursor}
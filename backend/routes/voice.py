@@ -1,4 +1,5 @@
 from fastapi import APIRouter, WebSocket, Depends, HTTPException, UploadFile, File, Request
+from fastapi.responses import FileResponse, StreamingResponse
 import azure.cognitiveservices.speech as speechsdk
 import asyncio
 import json
@@ -11,6 +12,17 @@ import random
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from .oauth2 import get_current_user
+from repository.watsonx_client import watsonx_pool
+from repository.speech import (
+    stop_speaking,
+    split_sentences,
+    pipeline_synthesis,
+    RecognitionSession,
+    AUDIO_SAMPLE_RATE,
+    transcribe_pcm,
+)
+from repository.audio_pipeline import process_upload, UnsupportedAudioError
+from repository.tts_cache import tts_cache, cached_synthesis, warm_up
 
 # Load environment variables
 load_dotenv()
@@ -34,61 +46,78 @@ TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 # ---------------------------
 # IBM Watsonx Integration Code
 # ---------------------------
-def run_watson_sales_coach(user_input: str):
-    from ibm_watsonx_ai import Credentials
-    from ibm_watsonx_ai.foundation_models import ModelInference
-    from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
-    from ibm_watsonx_ai.foundation_models.utils.enums import DecodingMethods
-
-    # Set up generation parameters
-    gen_params = {
-        GenParams.DECODING_METHOD: DecodingMethods.GREEDY,
-        GenParams.TEMPERATURE: 0.8,
-        GenParams.MIN_NEW_TOKENS: 10,
-        GenParams.MAX_NEW_TOKENS: 1024
-    }
-
-    # Initialize the model inference with IBM Watsonx credentials
-    model_inference = ModelInference(
-        model_id="mistralai/mixtral-8x7b-instruct-v01",  # Ensure this is correct
-        params=gen_params,
-        credentials=Credentials(
-            api_key="0YivQ4fK01hPbj2SBso-XKuovHb7ARTBxTuNSZRmHizG",
-            url="https://us-south.ml.cloud.ibm.com"
-        ),
-        project_id="ecf3764f-9871-4ef0-bc8b-4899f482e977"
+# Define a system prompt appropriate for a sales coach
+SALES_COACH_SYSTEM_PROMPT = ("You are a sales coach helping startups perfect their pitch. "
+                             "Ask one challenging question about their value proposition, target market, or competitive advantage. "
+                             "Keep your response short and focused.")
+
+
+FALLBACK_QUESTION = "How can you differentiate your solution from competitors?"
+
+
+def build_sales_coach_prompt(user_input: str) -> str:
+    return f"{SALES_COACH_SYSTEM_PROMPT}\n\nUser: {user_input}"
+
+# ---------------------------
+# Azure Speech configuration
+# ---------------------------
+VOICE_NAME = "en-US-GuyNeural"
+OUTPUT_FORMAT = speechsdk.SpeechSynthesisOutputFormat.Audio24Khz48KBitRateMonoMp3
+INITIAL_MESSAGE = "I am the IT Director evaluating your proposal. Convince me why I should trust your solution with our sensitive data."
+
+# Phrases synthesized into the TTS cache at startup
+TTS_WARMUP_PHRASES = [INITIAL_MESSAGE, FALLBACK_QUESTION]
+
+
+def build_speech_config() -> speechsdk.SpeechConfig:
+    speech_config = speechsdk.SpeechConfig(
+        subscription=os.getenv("AZURE_SPEECH_KEY"),
+        region=os.getenv("AZURE_SPEECH_REGION")
     )
-    
-    # Define a system prompt appropriate for a sales coach
-    system_prompt = ("You are a sales coach helping startups perfect their pitch. "
-                     "Ask one challenging question about their value proposition, target market, or competitive advantage. "
-                     "Keep your response short and focused.")
-    
-    complete_prompt = f"{system_prompt}\n\nUser: {user_input}"
-    
-    response = model_inference.generate(complete_prompt)
-    results = response.get('results', [])
-    del model_inference
-    # Extract generated text from each result
-    generated_texts = [item.get('generated_text') for item in results if item.get('generated_text')]
-    return generated_texts
+    speech_config.speech_synthesis_voice_name = VOICE_NAME
+    speech_config.set_speech_synthesis_output_format(OUTPUT_FORMAT)
+    return speech_config
+
+
+def synthesize_cached(synthesizer: speechsdk.SpeechSynthesizer, text: str):
+    return cached_synthesis(synthesizer, text, VOICE_NAME, str(OUTPUT_FORMAT))
+
+
+async def warm_tts_cache():
+    """Pre-synthesizes TTS_WARMUP_PHRASES so sessions never pay for them."""
+    try:
+        synthesizer = speechsdk.SpeechSynthesizer(speech_config=build_speech_config(), audio_config=None)
+        await warm_up(synthesizer, TTS_WARMUP_PHRASES, VOICE_NAME, str(OUTPUT_FORMAT))
+    except Exception as e:
+        print(f"TTS cache warm-up error: {e}")
 
 # ---------------------------
 # ModernSalesTrainer using IBM Watsonx
 # ---------------------------
 class ModernSalesTrainer:
     def __init__(self):
-        # No need for Together API key anymore.
+        # Clients live in the process-wide watsonx_pool; nothing to set up per session.
         pass
 
     async def get_response(self, user_input: str) -> str:
-        # Run the IBM Watsonx integration function in an executor since it is synchronous.
-        loop = asyncio.get_running_loop()
-        generated_texts = await loop.run_in_executor(None, run_watson_sales_coach, user_input)
+        # Generation runs on the pool's dedicated executor since the SDK is synchronous.
+        generated_texts = await watsonx_pool.generate(build_sales_coach_prompt(user_input))
         if generated_texts and len(generated_texts) > 0:
             return generated_texts[0].strip()
         else:
-            return "How can you differentiate your solution from competitors?"
+            return FALLBACK_QUESTION
+
+    async def stream_response(self, user_input: str):
+        """Yields the reply as Watsonx generates it, falling back to a stock question."""
+        produced = False
+        try:
+            async for delta in watsonx_pool.generate_stream(build_sales_coach_prompt(user_input)):
+                produced = True
+                yield delta
+        except Exception as e:
+            print(f"Watsonx streaming error: {e}")
+        if not produced:
+            yield FALLBACK_QUESTION
 
 # ---------------------------
 # Voice Chat Endpoint
@@ -97,16 +126,15 @@ class ModernSalesTrainer:
 async def voice_chat(websocket: WebSocket):
     await websocket.accept()
     print("WebSocket connected")
+    is_speaking = False
+    reply_task = None
+    recognition = None
     
     try:
         # Initialize Azure Speech configuration for synthesis and recognition.
-        speech_config = speechsdk.SpeechConfig(
-            subscription=os.getenv("AZURE_SPEECH_KEY"),
-            region=os.getenv("AZURE_SPEECH_REGION")
-        )
+        speech_config = build_speech_config()
         
         trainer = ModernSalesTrainer()
-        is_speaking = False
         loop = asyncio.get_running_loop()
         speech_lock = asyncio.Lock()
 
@@ -115,28 +143,62 @@ async def voice_chat(websocket: WebSocket):
             try:
                 async with speech_lock:
                     is_speaking = True
-                    result = speech_synthesizer.speak_text_async(text).get()
-                    if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                        audio_data = result.audio_data
-                        await websocket.send_bytes(audio_data)
+                    # Audio is streamed as fixed-size MP3 chunks framed by
+                    # audio_start/audio_end, so playback can begin on the first chunk.
+                    await websocket.send_json({"type": "audio_start", "format": "audio/mpeg"})
+                    async for chunk in synthesize_cached(speech_synthesizer, text):
+                        await websocket.send_bytes(chunk)
+                    await websocket.send_json({"type": "audio_end"})
                     is_speaking = False
             except Exception as e:
                 print(f"Speech synthesis error: {e}")
                 is_speaking = False
 
-        async def handle_recognition(text: str):
+        async def speak_response(text: str):
+            """Streams the coach reply sentence by sentence through TTS."""
             nonlocal is_speaking
+            async with speech_lock:
+                is_speaking = True
+                try:
+                    await websocket.send_json({"type": "audio_start", "format": "audio/mpeg"})
+                    sentences = split_sentences(trainer.stream_response(text))
+                    async for chunk in pipeline_synthesis(
+                        speech_synthesizer,
+                        sentences,
+                        synthesize=lambda sentence: synthesize_cached(speech_synthesizer, sentence)
+                    ):
+                        await websocket.send_bytes(chunk)
+                    await websocket.send_json({"type": "audio_end"})
+                except asyncio.CancelledError:
+                    # Barge-in: queued sentences were dropped with the pipeline.
+                    try:
+                        await websocket.send_json({"type": "audio_interrupted"})
+                    except Exception:
+                        pass
+                    raise
+                except Exception as e:
+                    print(f"Response pipeline error: {e}")
+                finally:
+                    is_speaking = False
+
+        async def interrupt_reply():
+            nonlocal reply_task
+            if reply_task is not None and not reply_task.done():
+                reply_task.cancel()
+                await asyncio.gather(reply_task, return_exceptions=True)
+            reply_task = None
+
+        async def handle_recognition(text: str):
+            nonlocal is_speaking, reply_task
             try:
                 if is_speaking:
-                    speech_synthesizer.stop_speaking_async().get()
+                    await interrupt_reply()
+                    await stop_speaking(speech_synthesizer)
                     await asyncio.sleep(0.2)
                     is_speaking = False
                     return
                 # Process new input if not currently synthesizing speech.
-                response = await trainer.get_response(text)
-                print(f"Generated response: {response}")
-                if response:
-                    await handle_speech_synthesis(response)
+                reply_task = asyncio.create_task(speak_response(text))
             except Exception as e:
                 print(f"Recognition handling error: {e}")
 
@@ -148,38 +210,40 @@ async def voice_chat(websocket: WebSocket):
                     loop
                 )
 
-        # Configure the Azure speech synthesis parameters.
-        speech_config.speech_synthesis_voice_name = "en-US-GuyNeural"
-        speech_config.set_speech_synthesis_output_format(
-            speechsdk.SpeechSynthesisOutputFormat.Audio24Khz48KBitRateMonoMp3
-        )
-        
         speech_synthesizer = speechsdk.SpeechSynthesizer(
             speech_config=speech_config,
             audio_config=None
         )
         
-        # Configure the speech recognizer to use the default microphone.
-        audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
-        speech_recognizer = speechsdk.SpeechRecognizer(
-            speech_config=speech_config,
-            audio_config=audio_config
+        # Recognize audio streamed by the client as binary PCM frames
+        # (16-bit mono, AUDIO_SAMPLE_RATE Hz unless ?sample_rate= is given).
+        sample_rate = int(websocket.query_params.get("sample_rate", AUDIO_SAMPLE_RATE))
+        recognition = RecognitionSession(
+            speech_config,
+            handle_speech_recognized,
+            sample_rate=sample_rate
         )
-        speech_recognizer.recognized.connect(handle_speech_recognized)
         
         # Send an initial greeting.
-        initial_message = "I am the IT Director evaluating your proposal. Convince me why I should trust your solution with our sensitive data."
-        await handle_speech_synthesis(initial_message)
+        await handle_speech_synthesis(INITIAL_MESSAGE)
         
-        speech_recognizer.start_continuous_recognition()
+        await recognition.start()
         print("Ready for conversation")
 
         while True:
             try:
-                message = await websocket.receive_text()
+                received = await websocket.receive()
+                if received["type"] == "websocket.disconnect":
+                    break
+                if received.get("bytes") is not None:
+                    # Waits while the audio buffer is full (backpressure).
+                    await recognition.feed(received["bytes"])
+                    continue
+                message = received.get("text")
                 if message == "stop":
                     break
                 elif message == "interrupt" and is_speaking:
+                    await interrupt_reply()
                     speech_synthesizer.stop_speaking_async()
             except Exception as e:
                 print(f"WebSocket error: {e}")
@@ -189,22 +253,60 @@ async def voice_chat(websocket: WebSocket):
         print(f"Error in voice chat: {e}")
     
     finally:
+        if reply_task is not None and not reply_task.done():
+            reply_task.cancel()
         if is_speaking:
             speech_synthesizer.stop_speaking_async()
-        speech_recognizer.stop_continuous_recognition()
-        await websocket.close()
+        if recognition is not None:
+            await recognition.close()
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+@router.get("/tts/{digest}")
+async def get_cached_tts(digest: str):
+    """Serve cached TTS audio by digest straight from disk (sendfile)."""
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest) or digest not in tts_cache:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return FileResponse(tts_cache.path(digest), media_type="audio/mpeg")
 
 @router.post("/process")
 async def process_voice(
     audio: UploadFile = File(...),
+    stream: bool = False,
     current_user = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
+    """
+    Transcribe an uploaded 16-bit PCM WAV recording segment by segment.
+    The upload is read in UPLOAD_CHUNK_SIZE pieces, so memory is bounded by
+    the chunk and segment size rather than the recording length. With
+    ?stream=true each segment is sent as an NDJSON line as soon as it is ready.
+    """
+    speech_config = build_speech_config()
+    segments = process_upload(
+        audio.read,
+        lambda pcm, rate: transcribe_pcm(speech_config, pcm, rate)
+    )
+
+    if stream:
+        async def ndjson():
+            try:
+                async for segment in segments:
+                    yield json.dumps(segment) + "\n"
+            except UnsupportedAudioError as e:
+                yield json.dumps({"error": str(e)}) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
     try:
-        # Process the audio file (this is a placeholder)
+        results = [segment async for segment in segments]
         return {
             "success": True,
-            "text_response": "Voice processing endpoint is working"
+            "segments": results,
+            "text_response": " ".join(s["text"] for s in results if s["text"])
         }
+    except UnsupportedAudioError as e:
+        raise HTTPException(status_code=415, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
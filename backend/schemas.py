@@ -2,6 +2,7 @@
 from pydantic import BaseModel
 from typing import List
 from typing import Optional, Any
+from datetime import datetime
 
 class ConversationCreate(BaseModel):
     user_id: str
@@ -12,11 +13,15 @@ class Conversation(BaseModel):
     user_id: str
     transcript: str
     analysis: Optional[Any] = None
-    created_at: str
+    created_at: datetime
 
     class Config:
         orm_mode = True
 
+class ConversationPage(BaseModel):
+    items: List[Conversation]
+    next_cursor: Optional[str] = None
+
 class ConversationAnalysis(BaseModel):
     aspect: str
     feedback: str
@@ -58,12 +63,56 @@ class SEOData(BaseModel):
     image_alt: str
     original_content: str
 
+class SEOBatchRequest(BaseModel):
+    contents: List[str]
+
+class SEOBatchResponse(BaseModel):
+    results: List[SEOData]
+
 class SocialPostResponse(BaseModel):
     success: bool
     fb_status: str
     post_url: Optional[str] = None
     optimized_content: Optional[dict] = None
+    timings: Optional[dict] = None
+
+
+class PostJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class PostJobStatus(BaseModel):
+    job_id: str
+    status: str
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[SocialPostResponse] = None
+    error: Optional[str] = None
+
+class ScheduledPostCreate(BaseModel):
+    content: str
+    scheduled_time: datetime
+    unsplash_image_id: Optional[str] = None
+    image_url: Optional[str] = None
+    hashtags: List[str] = []
+
+class ScheduledPostOut(BaseModel):
+    id: int
+    content: str
+    image_url: Optional[str] = None
+    hashtags: List[str] = []
+    scheduled_time: datetime
+    status: str
+    post_url: Optional[str] = None
+    error: Optional[str] = None
+    published_at: Optional[datetime] = None
 
+class ScheduledPostPage(BaseModel):
+    posts: List[ScheduledPostOut]
+    next_cursor: Optional[str] = None
 
 
 # Authetication 
@@ -429,7 +429,13 @@ async function createPost() {
             body: JSON.stringify(postData)
         });
 
-        const result = await response.json();
+        let result = await response.json();
+
+        // Posts are processed in the background; wait for the job to finish
+        if (response.status === 202) {
+            showToast('Optimizing and publishing your post...', 'success');
+            result = await waitForPostJob(result.job_id, token);
+        }
 
         if (result.success) {
             // Show success message with optimization details
@@ -460,6 +466,23 @@ async function createPost() {
     }
 }
 
+// Poll a queued post job until it has finished and return its result
+async function waitForPostJob(jobId, token, intervalMs = 1000) {
+    while (true) {
+        const response = await fetch(`/social_post/jobs/${jobId}`, {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        const job = await response.json();
+        if (!response.ok) {
+            return { success: false, fb_status: job.detail || 'Error creating post' };
+        }
+        if (job.status === 'succeeded' || job.status === 'failed') {
+            return job.result || { success: false, fb_status: job.error || 'Error creating post' };
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
 // Updated showToast function to support HTML content
 function showToast(message, type = 'success', isHTML = false) {
     const toast = document.getElementById('statusToast');
@@ -0,0 +1,34 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Backend modules import each other as top-level modules (run from backend/).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+# Clients built at import time (e.g. the Gemini chat model) need a key, not a valid one.
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+
+@pytest.fixture
+def sqlite_session(tmp_path, monkeypatch):
+    """A session factory on a fresh SQLite database with every table created."""
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+    from sqlalchemy.orm import sessionmaker
+    import database
+    from base import Base
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "async_session", session_factory)
+    yield session_factory
+    asyncio.run(engine.dispose())
@@ -0,0 +1,99 @@
+import asyncio
+import io
+import random
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from repository.audio_pipeline import UnsupportedAudioError, WavDecoder, process_upload
+
+RATE = 8000
+
+
+def make_wav(samples: np.ndarray, channels: int = 1, trailer: bytes = b"") -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(samples.astype("<i2").tobytes())
+    wav = out.getvalue()
+    if trailer:
+        # A chunk after the audio, with the RIFF size updated to include it
+        wav = wav[:4] + struct.pack("<I", len(wav) - 8 + len(trailer)) + wav[8:] + trailer
+    return wav
+
+
+def decode_in_pieces(wav: bytes, seed: int) -> np.ndarray:
+    rng = random.Random(seed)
+    decoder = WavDecoder()
+    pieces, offset = [], 0
+    while offset < len(wav):
+        size = rng.randint(1, 97)
+        pieces.append(decoder.feed(wav[offset:offset + size]))
+        offset += size
+    return np.concatenate(pieces)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_split_at_arbitrary_boundaries(seed):
+    samples = np.arange(-500, 500, dtype=np.int16) * 30
+    assert np.array_equal(decode_in_pieces(make_wav(samples), seed), samples)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_chunks_after_data_are_not_decoded(seed):
+    samples = np.arange(301, dtype=np.int16)
+    info = b"INFOISFT" + struct.pack("<I", 10) + b"Lavf58.76\x00"
+    trailer = b"LIST" + struct.pack("<I", len(info)) + info
+    assert np.array_equal(decode_in_pieces(make_wav(samples, trailer=trailer), seed), samples)
+
+
+def test_stereo_is_mixed_down():
+    stereo = np.array([[100, 300], [-200, -400], [0, 10]], dtype=np.int16)
+    decoded = decode_in_pieces(make_wav(stereo.reshape(-1), channels=2), seed=1)
+    assert decoded.tolist() == [200, -300, 5]
+
+
+def test_unknown_data_size_reads_to_end():
+    samples = np.arange(50, dtype=np.int16)
+    wav = bytearray(make_wav(samples))
+    data = wav.index(b"data")
+    wav[data + 4:data + 8] = struct.pack("<I", 0xFFFFFFFF)
+    assert np.array_equal(decode_in_pieces(bytes(wav), seed=2), samples)
+
+
+def test_zero_channels_is_rejected():
+    fmt = struct.pack("<HHIIHH", 1, 0, RATE, 0, 0, 16)
+    wav = b"RIFF" + struct.pack("<I", 36) + b"WAVE" + b"fmt " + struct.pack("<I", 16) + fmt + b"data" + struct.pack("<I", 0)
+    with pytest.raises(UnsupportedAudioError, match="fmt"):
+        WavDecoder().feed(wav)
+
+
+def test_data_before_fmt_is_rejected():
+    with pytest.raises(UnsupportedAudioError):
+        WavDecoder().feed(b"RIFF" + struct.pack("<I", 12) + b"WAVE" + b"data" + struct.pack("<I", 4) + b"\x00" * 4)
+
+
+def test_upload_is_transcribed_segment_by_segment():
+    samples = np.zeros(int(RATE * 2.5), dtype=np.int16)
+    wav = make_wav(samples)
+    offset = 0
+
+    async def read(size):
+        nonlocal offset
+        chunk = wav[offset:offset + size]
+        offset += len(chunk)
+        return chunk
+
+    async def transcribe(pcm, rate):
+        return f"{len(pcm) // 2} samples at {rate}"
+
+    async def run():
+        return [result async for result in process_upload(read, transcribe, chunk_size=1000, segment_seconds=1)]
+
+    results = asyncio.run(run())
+    assert [(r["start"], r["end"]) for r in results] == [(0.0, 1.0), (1.0, 2.0), (2.0, 2.5)]
+    assert results[-1]["text"] == "4000 samples at 8000"
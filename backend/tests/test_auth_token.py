@@ -0,0 +1,48 @@
+import base64
+import json
+import time
+
+import jwt
+import pytest
+from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
+
+from routes.auth_token import ALGORITHM, SECRET_KEY, TokenVerifier
+
+
+def make_token(exp: float, sub: str = "a@example.com") -> str:
+    return jwt.encode({"sub": sub, "exp": int(exp)}, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def test_verified_claims_are_cached():
+    verifier = TokenVerifier()
+    token = make_token(time.time() + 60)
+    assert verifier.decode(token)["sub"] == "a@example.com"
+    assert verifier.decode(token)["sub"] == "a@example.com"
+    assert verifier.stats()["hits"] == 1
+
+
+def test_cached_claims_expire_with_the_token():
+    verifier = TokenVerifier()
+    exp = int(time.time()) + 1
+    token = make_token(exp)
+    verifier.decode(token)
+    time.sleep(exp - time.time() + 0.2)
+    # The cache entry lapsed at `exp`, so the token is verified again and rejected.
+    with pytest.raises(ExpiredSignatureError):
+        verifier.decode(token)
+
+
+def test_tampered_token_is_never_served_from_cache():
+    verifier = TokenVerifier()
+    token = make_token(time.time() + 60)
+    verifier.decode(token)
+    header, payload, signature = token.split(".")
+    claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    claims["sub"] = "admin@example.com"
+    forged_payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    forged = ".".join([header, forged_payload, signature])
+    for _ in range(2):
+        with pytest.raises(InvalidTokenError):
+            verifier.decode(forged)
+    # Failed verifications are not cached.
+    assert verifier.stats()["size"] == 1
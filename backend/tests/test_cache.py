@@ -0,0 +1,47 @@
+import time
+
+from cache import LRUCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    cache = LRUCache(maxsize=4, ttl=10)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl=1)
+    clock.now += 5
+    assert "short" not in cache
+    assert cache.get("short") is None
+    assert cache.get("default") == 1
+    clock.now += 5
+    assert cache.get("default") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    # Expired entries are dropped on lookup.
+    assert len(cache) == 0
+
+
+def test_pop_removes_entry():
+    cache = LRUCache()
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
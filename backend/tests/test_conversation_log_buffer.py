@@ -0,0 +1,67 @@
+import asyncio
+
+from sqlalchemy import select, func
+
+import database
+from database import ConversationLogBuffer
+from models import ConversationLog
+
+
+def test_stop_during_flush_keeps_every_row(sqlite_session, monkeypatch):
+    async def scenario():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        class SlowSession:
+            # Holds the first INSERT open after its rows have left the queue.
+            def __init__(self):
+                self._session = sqlite_session()
+
+            async def __aenter__(self):
+                self.inner = await self._session.__aenter__()
+                return self
+
+            async def __aexit__(self, *exc):
+                return await self._session.__aexit__(*exc)
+
+            async def execute(self, statement):
+                started.set()
+                await release.wait()
+                return await self.inner.execute(statement)
+
+            async def commit(self):
+                await self.inner.commit()
+
+        monkeypatch.setattr(database, "async_session", SlowSession)
+        buffer = ConversationLogBuffer(batch_size=5, flush_interval=60, max_queue=100)
+        await buffer.start()
+        for i in range(12):
+            buffer.add("user", f"turn {i}")
+        await asyncio.wait_for(started.wait(), timeout=1)
+        assert buffer.stats()["queued"] == 7
+
+        stopping = asyncio.create_task(buffer.stop())
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.wait_for(stopping, timeout=5)
+
+        async with sqlite_session() as session:
+            count = (await session.execute(select(func.count()).select_from(ConversationLog))).scalar()
+        return count, buffer.stats()
+
+    count, stats = asyncio.run(scenario())
+    assert count == 12
+    assert stats["queued"] == 0
+    assert stats["dropped"] == 0
+
+
+def test_flush_writes_one_batch(sqlite_session):
+    async def scenario():
+        buffer = ConversationLogBuffer(batch_size=3, flush_interval=60, max_queue=10)
+        for i in range(5):
+            buffer.add("user", f"turn {i}")
+        assert await buffer.flush()
+        return buffer.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats == {"queued": 2, "flushed": 3, "dropped": 0, "failed_flushes": 0}
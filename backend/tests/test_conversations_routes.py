@@ -0,0 +1,101 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database import get_db
+from models import ConversationLog
+from routes import conversations
+from routes.oauth2 import get_current_user
+
+
+@pytest.fixture
+def client(sqlite_session):
+    async def seed():
+        start = datetime(2024, 1, 1)
+        async with sqlite_session() as session:
+            for i in range(5):
+                session.add(ConversationLog(user_id="1", transcript=f"mine {i}", created_at=start + timedelta(minutes=i)))
+            for i in range(3):
+                session.add(ConversationLog(user_id="2", transcript=f"theirs {i}", created_at=start + timedelta(minutes=i)))
+            await session.commit()
+
+    asyncio.run(seed())
+
+    async def override_db():
+        async with sqlite_session() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(conversations.router)
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, email="me@example.com")
+    return TestClient(app)
+
+
+def test_history_of_another_user_is_forbidden(client):
+    assert client.get("/conversations/2").status_code == 403
+
+
+def test_history_pages_through_own_logs(client):
+    first = client.get("/conversations/1", params={"limit": 3}).json()
+    assert [item["transcript"] for item in first["items"]] == ["mine 4", "mine 3", "mine 2"]
+    second = client.get("/conversations/1", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+    assert [item["transcript"] for item in second["items"]] == ["mine 1", "mine 0"]
+    assert second["next_cursor"] is None
+
+
+def test_export_without_user_id_is_scoped_to_current_user(client):
+    response = client.get("/conversations/export")
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines() if line]
+    assert len(rows) == 5
+    assert {row["user_id"] for row in rows} == {"1"}
+
+
+def test_export_of_another_user_is_forbidden(client):
+    assert client.get("/conversations/export", params={"user_id": "2"}).status_code == 403
+
+
+def test_voice_turn_is_readable_by_its_user(client, monkeypatch):
+    pytest.importorskip("textblob")
+    import database
+    from agents import ConversationSimulatorAgent
+
+    agent = ConversationSimulatorAgent(user_id="1")
+
+    async def generate():
+        return "Tell me more about your pricing."
+
+    monkeypatch.setattr(agent, "_generate_llm_response", generate)
+
+    async def run():
+        await agent.process_and_speak("We offer a monthly plan.")
+        agent.close()
+        await database.conversation_log_buffer.flush()
+
+    asyncio.run(run())
+    items = client.get("/conversations/1", params={"limit": 1}).json()["items"]
+    assert items[0]["transcript"] == "We offer a monthly plan."
+    assert items[0]["analysis"] == "Tell me more about your pricing."
+
+
+def test_export_accepts_timezone_aware_range(client):
+    # 00:01-00:03 UTC, written as +02:00 local time
+    response = client.get("/conversations/export", params={
+        "start": "2024-01-01T02:01:00+02:00", "end": "2024-01-01T00:03:00Z"
+    })
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [row["transcript"] for row in rows] == ["mine 1", "mine 2"]
+
+
+def test_export_rejects_empty_range(client):
+    response = client.get("/conversations/export", params={
+        "start": "2024-01-02T00:00:00Z", "end": "2024-01-01T00:00:00Z"
+    })
+    assert response.status_code == 400
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database import get_db
+from models import User
+from routes import authentication
+from routes.hashing import HashingOverloadedError, PasswordHasher, password_hasher
+
+
+def test_full_queue_is_rejected():
+    hasher = PasswordHasher(workers=1, max_pending=0)
+
+    async def run():
+        # Take the only worker slot, so the next caller would have to wait
+        # and max_pending=0 leaves no room for it.
+        await hasher._semaphore.acquire()
+        with pytest.raises(HashingOverloadedError):
+            await hasher.hash("secret")
+
+    asyncio.run(run())
+    assert hasher.stats()["rejected"] == 1
+
+
+def test_free_worker_is_used_even_with_no_pending_room():
+    hasher = PasswordHasher(workers=1, max_pending=0)
+    assert asyncio.run(hasher._run(lambda: "hashed")) == "hashed"
+    assert hasher.stats()["rejected"] == 0
+
+
+def test_login_returns_503_when_hashing_is_overloaded(sqlite_session, monkeypatch):
+    async def seed():
+        async with sqlite_session() as session:
+            session.add(User(name="a", email="a@example.com", password="not checked"))
+            await session.commit()
+
+    asyncio.run(seed())
+
+    async def override_db():
+        async with sqlite_session() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(authentication.router)
+    app.dependency_overrides[get_db] = override_db
+    # Every worker is busy and no caller may wait.
+    monkeypatch.setattr(password_hasher, "_semaphore", asyncio.Semaphore(0))
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = TestClient(app).post("/login", data={"username": "a@example.com", "password": "secret"})
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
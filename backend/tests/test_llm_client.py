@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from llm_client import LLMClient, LLMError
+
+
+def completion_app(peers):
+    async def handler(request):
+        # The client port identifies the TCP connection the request came in on.
+        peers.append(request.transport.get_extra_info("peername")[1])
+        body = await request.json()
+        text = body["messages"][-1]["content"]
+        return web.json_response({"choices": [{"message": {"content": f" echo {text} "}}]})
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    return app
+
+
+async def with_server(app, run):
+    server = TestServer(app)
+    await server.start_server()
+    client = LLMClient(url=str(server.make_url("/v1/chat/completions")), api_key="test")
+    try:
+        return await run(client)
+    finally:
+        await client.close()
+        await server.close()
+
+
+def test_sequential_calls_reuse_one_pooled_connection():
+    peers = []
+
+    async def run(client):
+        await client.start()
+        session = client._session
+        await client.start()
+        assert client._session is session
+
+        first = await client.chat_completion([{"role": "user", "content": "one"}])
+        second = await client.chat_completion([{"role": "user", "content": "two"}])
+        return first, second
+
+    first, second = asyncio.run(with_server(completion_app(peers), run))
+    assert (first, second) == ("echo one", "echo two")
+    assert len(peers) == 2 and peers[0] == peers[1]
+
+
+def test_close_releases_the_session_and_restarts_lazily():
+    peers = []
+
+    async def run(client):
+        await client.chat_completion([{"role": "user", "content": "one"}])
+        session = client._session
+        await client.close()
+        assert session.closed and client._session is None
+        return await client.chat_completion([{"role": "user", "content": "two"}])
+
+    assert asyncio.run(with_server(completion_app(peers), run)) == "echo two"
+    assert len(peers) == 2
+
+
+def test_non_200_raises_llm_error():
+    async def handler(request):
+        return web.Response(status=429, text="slow down")
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+
+    async def run(client):
+        try:
+            await client.chat_completion([{"role": "user", "content": "hi"}])
+        except LLMError as error:
+            return error
+
+    error = asyncio.run(with_server(app, run))
+    assert error.status == 429 and error.text == "slow down"
+
+
+def sse_app(writes, seen=None):
+    """Streams the given raw writes, flushing each one as its own network chunk."""
+
+    async def handler(request):
+        if seen is not None:
+            seen.append(await request.json())
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for write in writes:
+            await response.write(write.encode("utf-8"))
+            await asyncio.sleep(0.01)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    return app
+
+
+def sse_event(content):
+    return "data: " + json.dumps({"choices": [{"delta": {"content": content}}]}) + "\n\n"
+
+
+async def collect(client):
+    return [delta async for delta in client.stream_chat_completion([{"role": "user", "content": "hi"}])]
+
+
+def test_stream_reassembles_data_lines_split_across_chunks():
+    first, second = sse_event("Hel"), sse_event("lo")
+    writes = [
+        ": keep-alive\n\n",
+        first[:9], first[9:25], first[25:],
+        second[:3], second[3:],
+        "data: [DO", "NE]\n\n",
+    ]
+    seen = []
+    deltas = asyncio.run(with_server(sse_app(writes, seen), collect))
+    assert deltas == ["Hel", "lo"]
+    assert seen[0]["stream"] is True
+
+
+def test_stream_stops_at_done_and_skips_bad_chunks():
+    writes = [
+        sse_event("a"),
+        "data: {not json}\n\n",
+        "data: " + json.dumps({"choices": []}) + "\n\n",
+        "data: " + json.dumps({"choices": [{"text": "b"}]}) + "\n\n",
+        "data: [DONE]\n\n",
+        sse_event("after done"),
+    ]
+    assert asyncio.run(with_server(sse_app(writes), collect)) == ["a", "b"]
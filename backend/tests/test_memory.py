@@ -0,0 +1,123 @@
+import asyncio
+
+from memory import ConversationMemory, estimate_tokens
+
+
+def test_window_stays_within_token_budget():
+    memory = ConversationMemory(token_budget=10)
+    for i in range(6):
+        memory.append("user", f"{i}" * 16)  # 4 tokens each
+    assert [turn["content"][0] for turn in memory.history] == ["4", "5"]
+    assert sum(estimate_tokens(turn["content"]) for turn in memory.history) <= 10
+
+
+def test_latest_turn_is_kept_even_over_budget():
+    memory = ConversationMemory(token_budget=2)
+    memory.append("user", "x" * 100)
+    assert len(memory.history) == 1
+    assert not memory.has_context
+
+
+def test_evicted_turns_are_folded_into_summary():
+    memory = ConversationMemory(token_budget=4, summary_interval=2)
+    seen = []
+
+    async def summarize(previous, turns):
+        seen.append((previous, [turn["content"] for turn in turns]))
+        return "they said hello"
+
+    async def run():
+        for text in ["aaaa", "bbbb", "cccc"]:
+            memory.append("user", text * 4)
+            memory.maybe_refresh_summary(summarize)
+        await memory._summary_task
+
+    asyncio.run(run())
+    assert seen == [("", ["aaaa" * 4, "bbbb" * 4])]
+    messages = memory.build_messages("system prompt")
+    assert messages[0] == {"role": "system", "content": "system prompt"}
+    assert "they said hello" in messages[1]["content"]
+    assert messages[2:] == [{"role": "user", "content": "cccc" * 4}]
+
+
+def test_failed_summary_keeps_previous_one():
+    memory = ConversationMemory(token_budget=4, summary_interval=1)
+    memory.summary = "earlier"
+
+    async def summarize(previous, turns):
+        raise RuntimeError("model unavailable")
+
+    async def run():
+        memory.append("user", "a" * 16)
+        memory.append("user", "b" * 16)
+        memory.maybe_refresh_summary(summarize)
+        await memory._summary_task
+
+    asyncio.run(run())
+    assert memory.summary == "earlier"
+
+
+def test_failed_summary_is_retried_with_the_same_turns():
+    memory = ConversationMemory(token_budget=4, summary_interval=2)
+    attempts = []
+
+    async def summarize(previous, turns):
+        attempts.append([turn["content"][0] for turn in turns])
+        if len(attempts) == 1:
+            raise RuntimeError("model unavailable")
+        return "summary"
+
+    async def run():
+        for text in "abc":
+            memory.append("user", text * 16)
+        memory.maybe_refresh_summary(summarize)
+        await memory._summary_task
+        memory.append("user", "d" * 16)
+        memory.maybe_refresh_summary(summarize)
+        await memory._summary_task
+
+    asyncio.run(run())
+    assert attempts == [["a", "b"], ["a", "b", "c"]]
+    assert memory.summary == "summary"
+    assert len(memory._pending) == 0
+
+
+def test_turns_evicted_during_a_summary_are_kept():
+    memory = ConversationMemory(token_budget=4, summary_interval=1)
+
+    async def run():
+        release = asyncio.Event()
+        seen = []
+
+        async def summarize(previous, turns):
+            seen.append([turn["content"][0] for turn in turns])
+            await release.wait()
+            return previous + "".join(turn["content"][0] for turn in turns)
+
+        memory.append("user", "a" * 16)
+        memory.append("user", "b" * 16)
+        memory.maybe_refresh_summary(summarize)
+        await asyncio.sleep(0)
+        # Evicted while the first summary is still running.
+        for text in "cdef":
+            memory.append("user", text * 16)
+            memory.maybe_refresh_summary(summarize)
+        release.set()
+        await memory._summary_task
+        memory.maybe_refresh_summary(summarize)
+        await memory._summary_task
+        return seen
+
+    assert asyncio.run(run()) == [["a"], ["b", "c"]]
+    assert memory.summary == "abc"
+    assert [turn["content"][0] for turn in memory._pending] == ["d", "e"]
+
+
+def test_smaller_budget_trims_the_window():
+    memory = ConversationMemory(token_budget=20)
+    for text in "abcd":
+        memory.append("user", text * 16)
+    assert len(memory.history) == 4
+    memory.set_token_budget(8)
+    assert [turn["content"][0] for turn in memory.history] == ["c", "d"]
+    assert memory.has_context
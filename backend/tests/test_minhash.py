@@ -0,0 +1,36 @@
+from minhash import MinHashIndex, shingles
+
+DRAFT = "Join us this Saturday for our community garden open day, with free seedlings and coffee!"
+
+
+def test_shingles_ignore_case_and_spacing():
+    assert shingles("Hello   World") == shingles("hello world")
+
+
+def test_near_duplicate_is_found():
+    index = MinHashIndex()
+    index.add("draft", DRAFT, "optimized")
+    key, similarity, value = index.query(DRAFT.replace("Saturday", "Sunday"), threshold=0.7)
+    assert (key, value) == ("draft", "optimized")
+    assert 0.7 <= similarity < 1.0
+    assert index.query(DRAFT, threshold=0.99)[1] == 1.0
+
+
+def test_unrelated_text_is_a_miss():
+    index = MinHashIndex()
+    index.add("draft", DRAFT, "optimized")
+    assert index.query("Quarterly earnings call moved to Thursday at 3pm.", threshold=0.5) is None
+    assert index.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    index = MinHashIndex(maxsize=2)
+    index.add("a", "first draft about gardening", 1)
+    index.add("b", "second draft about cooking", 2)
+    assert index.query("first draft about gardening", threshold=0.9)[0] == "a"
+    index.add("c", "third draft about cycling", 3)
+    assert len(index) == 2
+    assert index.stats()["evictions"] == 1
+    assert index.query("second draft about cooking", threshold=0.9) is None
+    # The evicted entry no longer appears in any band bucket.
+    assert all("b" not in members for bucket in index._buckets for members in bucket.values())
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytest.importorskip("facebook")
+
+from cache import LRUCache
+from database import get_db
+from models import User
+from routes import authentication, oauth2
+from routes.auth_token import create_access_token
+from routes.oauth2 import get_current_user
+
+
+@pytest.fixture
+def auth(sqlite_session, monkeypatch):
+    monkeypatch.setattr(oauth2, "user_cache", LRUCache(maxsize=16, ttl=60))
+
+    async def seed():
+        async with sqlite_session() as session:
+            session.add(User(name="a", email="a@example.com", password="x"))
+            await session.commit()
+
+    asyncio.run(seed())
+
+    async def override_db():
+        async with sqlite_session() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(authentication.router)
+    app.dependency_overrides[get_db] = override_db
+
+    async def current_user():
+        async with sqlite_session() as session:
+            return await get_current_user(token=create_access_token({"sub": "a@example.com"}), db=session)
+
+    return TestClient(app), current_user
+
+
+def test_user_lookup_is_cached(auth):
+    _, current_user = auth
+    first = asyncio.run(current_user())
+    second = asyncio.run(current_user())
+    assert second is first
+    assert oauth2.user_cache.stats()["hits"] == 1
+
+
+def test_facebook_callback_invalidates_cached_user(auth, monkeypatch):
+    client, current_user = auth
+    assert asyncio.run(current_user()).facebook_token is None
+
+    async def get_facebook_token(code):
+        return {"access_token": "fb-token"}
+
+    monkeypatch.setattr(authentication.social_manager, "get_facebook_token", get_facebook_token)
+    token = create_access_token({"sub": "a@example.com"})
+    response = client.get("/auth/facebook/callback", params={"code": "abc", "state": f"Bearer {token}"})
+    assert "success: true" in response.text
+    assert asyncio.run(current_user()).facebook_token == "fb-token"
+
+
+def test_expired_facebook_token_clears_cached_user(auth, sqlite_session, monkeypatch):
+    client, current_user = auth
+
+    async def connect():
+        async with sqlite_session() as session:
+            user = await session.get(User, 1)
+            user.facebook_token = "fb-token"
+            await session.commit()
+
+    asyncio.run(connect())
+
+    async def get_facebook_user_info(facebook_token):
+        raise ValueError("token expired")
+
+    monkeypatch.setattr(authentication.social_manager, "get_facebook_user_info", get_facebook_user_info)
+    cached = asyncio.run(current_user())
+    assert cached.facebook_token == "fb-token"
+    client.app.dependency_overrides[get_current_user] = lambda: cached
+    assert client.get("/auth/facebook/status").json()["connected"] is False
+    assert asyncio.run(current_user()).facebook_token is None
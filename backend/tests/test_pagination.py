@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import decode_cursor, encode_cursor, get_conversation_logs_page, get_scheduled_posts_page
+from models import ConversationLog, ScheduledPost
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 250)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_conversation_pages_cover_every_row_once(sqlite_session):
+    async def run():
+        start = datetime(2024, 1, 1)
+        async with sqlite_session() as session:
+            # Pairs of rows share a timestamp, so the id breaks the tie.
+            for i in range(7):
+                session.add(ConversationLog(user_id="1", transcript=str(i), created_at=start + timedelta(minutes=i // 2)))
+            session.add(ConversationLog(user_id="2", transcript="other", created_at=start))
+            await session.commit()
+
+            pages, cursor = [], None
+            while True:
+                rows, cursor = await get_conversation_logs_page("1", limit=3, cursor=cursor, session=session)
+                pages.append([row.transcript for row in rows])
+                if cursor is None:
+                    return pages
+
+    assert asyncio.run(run()) == [["6", "5", "4"], ["3", "2", "1"], ["0"]]
+
+
+def test_scheduled_posts_are_paged_soonest_first(sqlite_session):
+    async def run():
+        start = datetime(2024, 1, 1)
+        async with sqlite_session() as session:
+            for i in range(4):
+                session.add(ScheduledPost(user_id=1, content=str(i), due_at=start + timedelta(hours=3 - i)))
+            await session.commit()
+
+            first, cursor = await get_scheduled_posts_page(1, limit=3, session=session)
+            second, last = await get_scheduled_posts_page(1, limit=3, cursor=cursor, session=session)
+            return [post.content for post in first], [post.content for post in second], last
+
+    assert asyncio.run(run()) == (["3", "2", "1"], ["0"], None)
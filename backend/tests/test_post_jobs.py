@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("facebook")
+
+from repository import post_jobs
+from repository.post_jobs import PostJobQueue
+
+
+@pytest.fixture
+def pipeline(sqlite_session, monkeypatch):
+    """Replaces the post pipeline with one that runs until `release` is set."""
+    monkeypatch.setattr(post_jobs, "async_session", sqlite_session)
+    state = {"started": None, "release": None}
+
+    async def run_post_pipeline(post, facebook_token):
+        state["started"].set()
+        await state["release"].wait()
+        return {"success": True, "fb_status": "posted"}
+
+    monkeypatch.setattr(post_jobs, "run_post_pipeline", run_post_pipeline)
+    return state
+
+
+async def start_job(queue, state):
+    state["started"], state["release"] = asyncio.Event(), asyncio.Event()
+    job_id = await queue.enqueue(1, {"content": "Hello"})
+    await queue.start()
+    await asyncio.wait_for(state["started"].wait(), timeout=5)
+    return job_id
+
+
+def test_stop_lets_running_job_finish(pipeline):
+    async def run():
+        queue = PostJobQueue(workers=2, poll_interval=0.05, shutdown_grace=5)
+        job_id = await start_job(queue, pipeline)
+        stopping = asyncio.create_task(queue.stop())
+        await asyncio.sleep(0.1)
+        assert not stopping.done()
+        pipeline["release"].set()
+        await stopping
+        return await queue.get(job_id)
+
+    job = asyncio.run(run())
+    assert job.status == "succeeded"
+    assert job.attempts == 1
+
+
+def test_job_cancelled_after_grace_is_not_retried(pipeline):
+    async def run():
+        queue = PostJobQueue(workers=1, poll_interval=0.05, shutdown_grace=0.1)
+        job_id = await start_job(queue, pipeline)
+        await queue.stop()
+        return await queue.get(job_id)
+
+    job = asyncio.run(run())
+    assert job.status == "failed"
+    assert "not retried" in job.error
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from repository.post_pipeline import DAGExecutor, Stage, StageError
+
+
+def run(stages):
+    return asyncio.run(DAGExecutor(stages).run())
+
+
+def test_fallback_receives_the_error():
+    async def broken(results):
+        raise ValueError("bad token")
+
+    async def slow(results):
+        await asyncio.sleep(1)
+
+    results, timings = run([
+        Stage("broken", broken, fallback=lambda results, error: f"error: {error}"),
+        Stage("slow", slow, timeout=0.01, fallback=lambda results, error: type(error).__name__),
+    ])
+    assert results == {"broken": "error: bad token", "slow": "TimeoutError"}
+    assert timings["broken"]["status"] == "error"
+    assert timings["slow"]["status"] == "timeout"
+
+
+def test_stages_receive_their_dependencies():
+    async def first(results):
+        return 2
+
+    async def second(results):
+        return results["first"] * 10
+
+    results, _ = run([Stage("second", second, depends_on=("first",)), Stage("first", first)])
+    assert results == {"first": 2, "second": 20}
+
+
+def test_failure_without_fallback_fails_the_run():
+    async def broken(results):
+        raise ValueError("bad token")
+
+    with pytest.raises(StageError):
+        run([Stage("broken", broken)])
@@ -0,0 +1,59 @@
+import asyncio
+
+from response_cache import ResponseCache, make_cache_key, normalize_text
+
+
+def test_normalization_collapses_whitespace_only():
+    assert normalize_text("  Hello \n  World ") == "Hello World"
+    assert make_cache_key("m", "Be brief.", "What is   the price?", 0.7) == \
+        make_cache_key("m", "Be  brief.", "what is the price", 0.7)
+    assert make_cache_key("m", "Be brief.", "price", 0.7) != make_cache_key("m", "Be brief.", "price", 0.2)
+
+
+def test_disk_tier_survives_restart_and_is_promoted(tmp_path):
+    path = str(tmp_path / "responses.db")
+
+    async def run():
+        first = ResponseCache(maxsize=8, default_ttl=60, disk_path=path)
+        await first.set("key", "cached reply")
+        first.close()
+
+        second = ResponseCache(maxsize=8, default_ttl=60, disk_path=path)
+        assert await second.get("key") == "cached reply"
+        # Promoted, so the next lookup is answered from memory.
+        assert await second.get("key") == "cached reply"
+        assert await second.get("other") is None
+        stats = second.stats()
+        second.close()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["disk_hits"] == 1
+    assert stats["hits"] == 1
+    # The disk hit is not counted as a miss.
+    assert stats["misses"] == 1
+
+
+def test_expired_disk_entry_is_a_miss(tmp_path):
+    async def run():
+        cache = ResponseCache(maxsize=8, default_ttl=60, disk_path=str(tmp_path / "responses.db"))
+        await cache.set("key", "stale", ttl=-1)
+        value = await cache.get("key")
+        stats = cache.stats()
+        cache.close()
+        return value, stats
+
+    value, stats = asyncio.run(run())
+    assert value is None
+    assert stats["misses"] == 1 and stats["disk_hits"] == 0
+
+
+def test_memory_only_cache_counts_misses():
+    async def run():
+        cache = ResponseCache(maxsize=8, default_ttl=60, disk_path=None)
+        await cache.set("key", "reply")
+        return await cache.get("key"), await cache.get("other"), cache.stats()
+
+    hit, miss, stats = asyncio.run(run())
+    assert (hit, miss) == ("reply", None)
+    assert stats["hits"] == 1 and stats["misses"] == 1 and not stats["disk_enabled"]
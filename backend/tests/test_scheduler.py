@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("facebook")
+
+from models import ScheduledPost, User
+from repository import scheduler
+from repository.scheduler import PostScheduler
+
+
+@pytest.fixture
+def facebook(sqlite_session, monkeypatch):
+    monkeypatch.setattr(scheduler, "async_session", sqlite_session)
+    posted = []
+
+    async def post_to_facebook(content, image_url=None, hashtags=None, facebook_token=None):
+        posted.append((content, facebook_token))
+        return {"success": True, "status": "Posted", "post_url": "https://facebook.com/1"}
+
+    monkeypatch.setattr(scheduler.social_manager, "post_to_facebook", post_to_facebook)
+    return posted
+
+
+async def add_post(session_factory) -> int:
+    async with session_factory() as session:
+        session.add(User(id=1, name="a", email="a@example.com", password="x", facebook_token="token"))
+        post = ScheduledPost(user_id=1, content="Hello", due_at=datetime.utcnow() - timedelta(seconds=1))
+        session.add(post)
+        await session.commit()
+        return post.id
+
+
+def test_due_post_is_published(sqlite_session, facebook):
+    async def run():
+        post_id = await add_post(sqlite_session)
+        post_scheduler = PostScheduler()
+        await post_scheduler._claim_and_publish([post_id])
+        await asyncio.gather(*post_scheduler._in_flight)
+        async with sqlite_session() as session:
+            return await session.get(ScheduledPost, post_id)
+
+    post = asyncio.run(run())
+    assert facebook == [("Hello", "token")]
+    assert post.status == "published"
+    assert post.attempts == 1
+
+
+def test_failed_status_update_is_logged(sqlite_session, facebook, monkeypatch, caplog):
+    async def run():
+        post_id = await add_post(sqlite_session)
+        post_scheduler = PostScheduler()
+        await post_scheduler._claim_and_publish([post_id])
+        # The database goes away while the post is being published.
+        monkeypatch.setattr(scheduler, "async_session", None)
+        await asyncio.gather(*post_scheduler._in_flight)
+        return post_scheduler
+
+    post_scheduler = asyncio.run(run())
+    assert post_scheduler.failed == 1
+    assert "status update failed" in caplog.text
@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain_google_genai")
+
+from cache import LRUCache
+from minhash import MinHashIndex
+from repository import seo_langgraph
+from repository.seo_langgraph import optimize_contents_for_seo
+
+BAKERY = "Fresh sourdough loaves come out of our oven every morning at seven."
+GYM = "New evening yoga classes start at the gym on Tuesday and Thursday."
+GARAGE = "Winter tyre fitting is half price at the garage throughout November."
+
+
+class FakeBatchChain:
+    """Answers each draft with itself as the post text; drafts mentioning the gym fail."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def abatch(self, inputs, config=None, return_exceptions=False):
+        self.batches.append(([item["content"] for item in inputs], config))
+        outputs = []
+        for item in inputs:
+            content = item["content"]
+            if "gym" in content:
+                outputs.append(RuntimeError("quota exceeded"))
+                continue
+            outputs.append(SimpleNamespace(content=(
+                f"SEO_VERSION: {content}\nFACEBOOK_VERSION: {content}\n"
+                "HASHTAGS: #local\nMETA_DESCRIPTION: Local news\nIMAGE_ALT: Shop front"
+            )))
+        return outputs
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    fake = FakeBatchChain()
+    monkeypatch.setattr(seo_langgraph, "seo_chain", fake)
+    monkeypatch.setattr(seo_langgraph, "seo_cache", LRUCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(seo_langgraph, "seo_similar", MinHashIndex(maxsize=16))
+    return fake
+
+
+def test_batch_sends_each_distinct_draft_once_and_keeps_input_order(chain):
+    drafts = [BAKERY, GARAGE, "  " + BAKERY.replace(" ", "  "), GARAGE]
+    results = asyncio.run(optimize_contents_for_seo(drafts, max_concurrency=2))
+
+    assert chain.batches == [([BAKERY, GARAGE], {"max_concurrency": 2})]
+    assert [result["original_content"] for result in results] == drafts
+    assert [result["facebook_content"] for result in results] == [BAKERY, GARAGE, BAKERY, GARAGE]
+    assert all(result["hashtags"] == ["#local"] for result in results)
+
+
+def test_failed_draft_falls_back_without_failing_the_batch(chain):
+    results = asyncio.run(optimize_contents_for_seo([BAKERY, GYM]))
+
+    assert results[0]["meta_description"] == "Local news"
+    assert results[1] == seo_langgraph.fallback_seo_result(GYM)
+    # Only the successful draft is cached; the failed one is retried next time.
+    asyncio.run(optimize_contents_for_seo([BAKERY, GYM]))
+    assert chain.batches[1][0] == [GYM]
+
+
+def test_cached_drafts_skip_the_model(chain):
+    asyncio.run(optimize_contents_for_seo([BAKERY]))
+    results = asyncio.run(optimize_contents_for_seo([BAKERY]))
+
+    assert len(chain.batches) == 1
+    assert results[0]["facebook_content"] == BAKERY
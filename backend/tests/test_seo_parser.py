@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("langchain_google_genai")
+
+from repository.seo_langgraph import SEOSectionParser, build_seo_result, parse_seo_response
+
+RESPONSE = """SEO_VERSION: Fresh coffee, every morning.
+Now with oat milk.
+FACEBOOK_VERSION: Come try our new oat latte!
+HASHTAGS: #coffee, #oatmilk ,
+META_DESCRIPTION: Fresh coffee daily.
+IMAGE_ALT: A latte on a wooden table"""
+
+
+def test_sections_complete_when_next_header_starts():
+    parser = SEOSectionParser()
+    assert parser.feed("SEO_VERSION: Fresh coffee, ") == []
+    assert parser.feed("every morning.\nNow with oat milk.\n") == []
+    assert parser.feed("FACEBOOK_VERSION: Come") == []
+    assert parser.feed(" try it!\nHASH") == [("SEO_VERSION", "Fresh coffee, every morning.\nNow with oat milk.")]
+    assert parser.feed("TAGS: #coffee") == []
+    assert parser.close() == [("FACEBOOK_VERSION", "Come try it!"), ("HASHTAGS", "#coffee")]
+
+
+def test_streamed_parse_matches_whole_parse():
+    parser = SEOSectionParser()
+    sections = []
+    for start in range(0, len(RESPONSE), 7):
+        sections.extend(parser.feed(RESPONSE[start:start + 7]))
+    sections.extend(parser.close())
+    assert dict(sections) == parse_seo_response(RESPONSE)
+
+
+def test_build_result_falls_back_for_missing_sections():
+    result = build_seo_result(parse_seo_response(RESPONSE), "draft")
+    assert result["hashtags"] == ["#coffee", "#oatmilk"]
+    assert result["facebook_content"] == "Come try our new oat latte!"
+    partial = build_seo_result(parse_seo_response("Unrelated text\nHASHTAGS: #a"), "draft")
+    assert partial["seo_content"] == "draft"
+    assert partial["hashtags"] == ["#a"]
@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain_google_genai")
+
+from cache import LRUCache
+from minhash import MinHashIndex
+from repository import seo_langgraph
+from repository.seo_langgraph import optimize_content_for_seo
+
+DRAFT = "Big spring sale at our downtown store this Saturday: {} off all garden tools and seeds, while stocks last!"
+
+
+class FakeChain:
+    """Writes the draft back as every section, the way a faithful model would."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        content = inputs["content"]
+        return SimpleNamespace(content=(
+            f"SEO_VERSION: {content}\nFACEBOOK_VERSION: {content}\n"
+            "HASHTAGS: #sale, #garden\nMETA_DESCRIPTION: Spring garden sale\nIMAGE_ALT: Garden tools"
+        ))
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    fake = FakeChain()
+    monkeypatch.setattr(seo_langgraph, "seo_chain", fake)
+    monkeypatch.setattr(seo_langgraph, "seo_cache", LRUCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(seo_langgraph, "seo_similar", MinHashIndex(maxsize=16))
+    return fake
+
+
+def test_near_duplicate_posts_its_own_text(chain):
+    first = asyncio.run(optimize_content_for_seo(DRAFT.format("20%")))
+    second = asyncio.run(optimize_content_for_seo(DRAFT.format("50%")))
+
+    # The second draft was answered from the index, without a model call...
+    assert chain.calls == 1
+    assert seo_langgraph.seo_similar.stats()["hits"] == 1
+    # ...but its post text is its own, with the changed fact.
+    assert "20%" in first["facebook_content"]
+    assert "50%" in second["facebook_content"] and "20%" not in second["facebook_content"]
+    assert "50%" in second["seo_content"] and "20%" not in second["seo_content"]
+    assert second["hashtags"] == ["#sale", "#garden"]
+    assert second["meta_description"] == "Spring garden sale"
+
+
+def test_exact_repeat_reuses_the_whole_result(chain):
+    first = asyncio.run(optimize_content_for_seo(DRAFT.format("20%")))
+    again = asyncio.run(optimize_content_for_seo(DRAFT.format("20%")))
+    assert chain.calls == 1
+    assert again == first
@@ -0,0 +1,185 @@
+import asyncio
+import ctypes
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+speechsdk = pytest.importorskip("azure.cognitiveservices.speech")
+
+from repository import speech
+from repository.speech import stream_synthesis
+
+
+class FakeStream:
+    def __init__(self, audio: bytes):
+        self._audio = audio
+        self.status = speechsdk.StreamStatus.AllData
+
+    def read_data(self, buffer) -> int:
+        filled = min(len(buffer), len(self._audio))
+        # Like the SDK, writes into the caller's (immutable) bytes buffer.
+        ctypes.memmove(buffer, self._audio, filled)
+        self._audio = self._audio[filled:]
+        return filled
+
+
+class FakeSynthesizer:
+    def __init__(self):
+        self.stops = 0
+
+    def start_speaking_text_async(self, text):
+        return SimpleNamespace(get=lambda: SimpleNamespace(reason=speechsdk.ResultReason.SynthesizingAudioStarted))
+
+    def stop_speaking_async(self):
+        self.stops += 1
+        return SimpleNamespace(get=lambda: None)
+
+
+@pytest.fixture(autouse=True)
+def fake_stream(monkeypatch):
+    monkeypatch.setattr(speech.speechsdk, "AudioDataStream", lambda result: FakeStream(b"x" * 100))
+
+
+def test_finished_synthesis_is_not_stopped():
+    synthesizer = FakeSynthesizer()
+
+    async def run():
+        return [chunk async for chunk in stream_synthesis(synthesizer, "Hello.", chunk_size=10)]
+
+    assert len(asyncio.run(run())) == 10
+    assert synthesizer.stops == 0
+
+
+def test_abandoned_synthesis_is_stopped():
+    synthesizer = FakeSynthesizer()
+
+    async def run():
+        chunks = stream_synthesis(synthesizer, "Hello.", chunk_size=10)
+        await chunks.__anext__()
+        await chunks.aclose()
+
+    asyncio.run(run())
+    assert synthesizer.stops == 1
+
+
+def test_chunks_arrive_in_order_and_intact(monkeypatch):
+    audio = bytes(range(256)) * 3
+    monkeypatch.setattr(speech.speechsdk, "AudioDataStream", lambda result: FakeStream(audio))
+
+    async def run():
+        return [chunk async for chunk in stream_synthesis(FakeSynthesizer(), "Hello.", chunk_size=100)]
+
+    chunks = asyncio.run(run())
+    assert [len(chunk) for chunk in chunks] == [100] * 7 + [68]
+    assert b"".join(chunks) == audio
+
+
+def test_synthesis_cut_short_raises(monkeypatch):
+    def cut_short(result):
+        stream = FakeStream(b"x" * 30)
+        stream.status = speechsdk.StreamStatus.Canceled
+        stream.cancellation_details = SimpleNamespace(reason="Error", error_details="connection lost")
+        return stream
+
+    monkeypatch.setattr(speech.speechsdk, "AudioDataStream", cut_short)
+    received = []
+
+    async def run():
+        async for chunk in stream_synthesis(FakeSynthesizer(), "Hello.", chunk_size=10):
+            received.append(chunk)
+
+    with pytest.raises(speech.SpeechSynthesisError, match="connection lost"):
+        asyncio.run(run())
+    # Audio produced before the failure was still delivered.
+    assert len(received) == 3
+
+
+def test_sentence_splitter_holds_short_fragments():
+    splitter = speech.SentenceSplitter(min_chars=20)
+    assert splitter.feed("Sure. I can help with ") == []
+    assert splitter.feed("that right away. Next") == ["Sure. I can help with that right away."]
+    assert splitter.feed(" question?\n") == []
+    assert splitter.flush() == "Next question?"
+    assert splitter.flush() is None
+
+
+def test_split_sentences_keeps_remainder():
+    async def deltas():
+        for delta in ["This is the first sentence. ", "And a trailing bit"]:
+            yield delta
+
+    async def run():
+        return [sentence async for sentence in speech.split_sentences(deltas(), min_chars=5)]
+
+    assert asyncio.run(run()) == ["This is the first sentence.", "And a trailing bit"]
+
+
+class FakeSignal:
+    def __init__(self):
+        self.callbacks = []
+
+    def connect(self, callback):
+        self.callbacks.append(callback)
+
+
+class FakeRecognizer:
+    def __init__(self):
+        self.recognized = FakeSignal()
+        self.running = False
+
+    def start_continuous_recognition_async(self):
+        self.running = True
+        return SimpleNamespace(get=lambda: None)
+
+    def stop_continuous_recognition_async(self):
+        self.running = False
+        return SimpleNamespace(get=lambda: None)
+
+
+class FakePushStream:
+    def __init__(self, stream_format=None):
+        self.written = []
+        self.closed = False
+        self.unblocked = threading.Event()
+        self.unblocked.set()
+
+    def write(self, frame):
+        self.unblocked.wait(timeout=5)
+        self.written.append(frame)
+
+    def close(self):
+        self.closed = True
+
+
+def test_recognition_session_writes_frames_in_order(monkeypatch):
+    monkeypatch.setattr(speech.speechsdk.audio, "PushAudioInputStream", FakePushStream)
+    monkeypatch.setattr(speech.speechsdk.audio, "AudioConfig", lambda stream: SimpleNamespace(stream=stream))
+    recognizer = FakeRecognizer()
+    on_recognized = object()
+
+    async def run():
+        session = speech.RecognitionSession(
+            None, on_recognized, max_buffered_frames=2,
+            recognizer_factory=lambda speech_config, audio_config: recognizer
+        )
+        await session.start()
+        assert recognizer.running
+        push_stream = session._push_stream
+        # A stalled writer fills the buffer, so feed() has to wait.
+        push_stream.unblocked.clear()
+        asyncio.get_running_loop().call_later(0.1, push_stream.unblocked.set)
+        for i in range(5):
+            await session.feed(bytes([i]) * 4)
+        await session.feed(b"")
+        stats = session.stats()
+        await session.close()
+        return push_stream, stats
+
+    push_stream, stats = asyncio.run(run())
+    assert recognizer.recognized.callbacks == [on_recognized]
+    assert push_stream.written == [bytes([i]) * 4 for i in range(5)]
+    assert push_stream.closed and not recognizer.running
+    assert stats["frames_received"] == 5
+    assert stats["bytes_received"] == 20
+    assert stats["backpressure_waits"] >= 1
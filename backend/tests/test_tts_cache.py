@@ -0,0 +1,96 @@
+import asyncio
+import ctypes
+from types import SimpleNamespace
+
+import pytest
+
+speechsdk = pytest.importorskip("azure.cognitiveservices.speech")
+
+from repository import speech
+from repository.speech import SpeechSynthesisError
+from repository.tts_cache import TTSCache, cached_synthesis
+
+
+class FakeStream:
+    """AudioDataStream stand-in that returns `audio` and then reports `status`."""
+
+    def __init__(self, audio: bytes, status):
+        self._audio = audio
+        self.status = status
+        self.cancellation_details = SimpleNamespace(reason="Error", error_details="connection lost")
+
+    def read_data(self, buffer) -> int:
+        filled = min(len(buffer), len(self._audio))
+        # Like the SDK, writes into the caller's (immutable) bytes buffer.
+        ctypes.memmove(buffer, self._audio, filled)
+        self._audio = self._audio[filled:]
+        return filled
+
+
+class FakeSynthesizer:
+    def start_speaking_text_async(self, text):
+        return SimpleNamespace(get=lambda: SimpleNamespace(reason=speechsdk.ResultReason.SynthesizingAudioStarted))
+
+    def stop_speaking_async(self):
+        return SimpleNamespace(get=lambda: None)
+
+
+@pytest.fixture
+def stream_status(monkeypatch):
+    state = {"status": speechsdk.StreamStatus.AllData}
+    monkeypatch.setattr(speech.speechsdk, "AudioDataStream",
+                        lambda result: FakeStream(b"x" * 10000, state["status"]))
+    return state
+
+
+async def collect(cache, chunk_size=4096):
+    chunks = []
+    async for chunk in cached_synthesis(FakeSynthesizer(), "Hello there.", "voice", "mp3",
+                                        cache=cache, chunk_size=chunk_size):
+        chunks.append(bytes(chunk))
+    return b"".join(chunks)
+
+
+def test_cancelled_stream_raises_and_is_not_cached(tmp_path, stream_status):
+    cache = TTSCache(directory=str(tmp_path))
+    stream_status["status"] = speechsdk.StreamStatus.Canceled
+    with pytest.raises(SpeechSynthesisError):
+        asyncio.run(collect(cache))
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_completed_stream_is_cached_and_served_from_disk(tmp_path, stream_status):
+    cache = TTSCache(directory=str(tmp_path), hot_entry_bytes=0)
+    assert asyncio.run(collect(cache)) == b"x" * 10000
+    assert asyncio.run(collect(cache)) == b"x" * 10000
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_small_disk_hit_is_promoted_as_bytes(tmp_path, stream_status):
+    asyncio.run(collect(TTSCache(directory=str(tmp_path))))
+    cache = TTSCache(directory=str(tmp_path))
+    digest = cache.key("voice", "mp3", "Hello there.")
+    assert isinstance(cache.get(digest), bytes)
+
+
+def test_disk_hit_file_is_closed_even_when_abandoned(tmp_path, stream_status):
+    cache = TTSCache(directory=str(tmp_path), hot_entry_bytes=0)
+    asyncio.run(collect(cache))
+    opened = []
+    get = cache.get
+
+    def tracking_get(digest):
+        audio = get(digest)
+        opened.append(audio)
+        return audio
+
+    cache.get = tracking_get
+
+    async def first_chunk():
+        chunks = cached_synthesis(FakeSynthesizer(), "Hello there.", "voice", "mp3", cache=cache, chunk_size=4096)
+        chunk = await chunks.__anext__()
+        await chunks.aclose()
+        return chunk
+
+    assert asyncio.run(first_chunk()) == b"x" * 4096
+    assert opened[0].closed
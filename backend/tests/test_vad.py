@@ -0,0 +1,50 @@
+import numpy as np
+
+from vad import VoiceActivityDetector
+
+RATE = 16000
+
+
+def tone(seconds: float, amplitude: int = 8000) -> bytes:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype("<i2").tobytes()
+
+
+def silence(seconds: float) -> bytes:
+    return bytes(2 * int(RATE * seconds))
+
+
+def test_utterance_is_trimmed_to_padding():
+    vad = VoiceActivityDetector(sample_rate=RATE, hangover_ms=300, padding_ms=100)
+    utterances = vad.feed(silence(1.0) + tone(0.6) + silence(1.0))
+    assert len(utterances) == 1
+    seconds = len(utterances[0]) / 2 / RATE
+    assert 0.6 <= seconds <= 0.6 + 2 * 0.1 + 0.03
+    assert vad.stats()["utterances"] == 1
+
+
+def test_result_does_not_depend_on_chunking():
+    audio = silence(0.5) + tone(0.4) + silence(0.6) + tone(0.5) + silence(0.6)
+    whole = VoiceActivityDetector(sample_rate=RATE).feed(audio)
+    chunked = VoiceActivityDetector(sample_rate=RATE)
+    pieces = []
+    # Odd chunk sizes split samples across chunks.
+    for start in range(0, len(audio), 777):
+        pieces.extend(chunked.feed(audio[start:start + 777]))
+    assert len(whole) == 2
+    assert pieces == whole
+
+
+def test_clicks_are_dropped():
+    vad = VoiceActivityDetector(sample_rate=RATE, min_speech_ms=150)
+    assert vad.feed(silence(0.5) + tone(0.03) + silence(1.0)) == []
+    assert vad.stats()["dropped"] == 1
+
+
+def test_long_speech_is_cut_at_max_length():
+    vad = VoiceActivityDetector(sample_rate=RATE, max_utterance_seconds=1.0)
+    utterances = vad.feed(tone(2.5))
+    assert len(utterances) == 2
+    # Cut at the first frame boundary past the limit (30 ms frames).
+    assert all(len(utterance) / 2 / RATE <= 1.0 + 0.03 for utterance in utterances)
+    assert vad.flush() is not None
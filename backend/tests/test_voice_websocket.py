@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("textblob")
+pytest.importorskip("jinja2")
+
+import agents
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    saved = []
+
+    def save(user_id, transcript, analysis):
+        saved.append((user_id, transcript, analysis))
+
+    async def generate(self):
+        return "What does it cost?"
+
+    async def stream(self):
+        for delta in ["What ", "does ", "it cost?"]:
+            yield delta
+
+    async def slow_feedback(history):
+        # Feedback is slower than the reply; it must not hold the reply back.
+        await asyncio.sleep(0.2)
+        return f"Feedback on: {history[-1]['content']}"
+
+    monkeypatch.setattr(agents, "save_conversation_in_background", save)
+    monkeypatch.setattr(main, "save_conversation_in_background", save)
+    monkeypatch.setattr(agents.ConversationSimulatorAgent, "_generate_llm_response", generate)
+    monkeypatch.setattr(agents.ConversationSimulatorAgent, "_stream_llm_response", stream)
+    monkeypatch.setattr(agents.FeedbackAgent, "process", staticmethod(slow_feedback))
+    test_client = TestClient(main.app)
+    test_client.saved = saved
+    return test_client
+
+
+def test_feedback_arrives_in_its_own_frame_after_the_reply(client):
+    with client.websocket_connect("/ws/voice") as ws:
+        ws.send_bytes(b"Our plan is $20 a month.")
+        reply = ws.receive_json()
+        feedback = ws.receive_json()
+
+    assert reply == {"transcription": "Our plan is $20 a month.", "response_text": "What does it cost?"}
+    assert feedback == {
+        "type": "feedback",
+        "transcription": "Our plan is $20 a month.",
+        "feedback": "Feedback on: What does it cost?",
+    }
+    # Both the reply and the feedback are logged.
+    assert ("default_user", "Our plan is $20 a month.", "What does it cost?") in client.saved
+    assert ("default_user", "Our plan is $20 a month.", "Feedback on: What does it cost?") in client.saved
+
+
+def test_streamed_reply_sends_feedback_after_the_final_frame(client):
+    with client.websocket_connect("/ws/voice?stream=true") as ws:
+        ws.send_bytes(b"Our plan is $20 a month.")
+        frames = [ws.receive_json() for _ in range(5)]
+
+    assert [frame["type"] for frame in frames] == ["delta", "delta", "delta", "final", "feedback"]
+    assert "".join(frame["response_text"] for frame in frames[:3]) == "What does it cost?"
+    assert frames[3]["response_text"] == "What does it cost?"
+    assert frames[4]["feedback"] == "Feedback on: What does it cost?"
@@ -0,0 +1,17 @@
+import asyncio
+
+import pytest
+
+from repository import watsonx_client
+from repository.watsonx_client import WatsonxConfigError, WatsonxPool
+
+
+def test_missing_credentials_fail_clearly(monkeypatch):
+    monkeypatch.setattr(watsonx_client, "WATSONX_API_KEY", None)
+    monkeypatch.setattr(watsonx_client, "WATSONX_PROJECT_ID", "")
+    pool = WatsonxPool(pool_size=1)
+    with pytest.raises(WatsonxConfigError, match="WATSONX_API_KEY, WATSONX_PROJECT_ID"):
+        asyncio.run(pool.generate("Hello"))
+    # The slot is kept, so a call after the environment is fixed can still build a client.
+    assert pool._idle.qsize() == 1
+    assert pool.stats()["errors"] == 1
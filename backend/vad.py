@@ -0,0 +1,185 @@
+# vad.py
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+VAD_SAMPLE_RATE = int(os.getenv("VAD_SAMPLE_RATE", 16000))
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", 30))
+# Frames at or above this level (dBFS) are speech.
+VAD_ENERGY_THRESHOLD_DB = float(os.getenv("VAD_ENERGY_THRESHOLD_DB", -35))
+# Quieter frames (down to VAD_ZCR_ENERGY_MARGIN_DB below the threshold) still
+# count as speech when their zero-crossing rate is high, which keeps unvoiced
+# consonants ("s", "f") attached to the words around them.
+VAD_ZCR_THRESHOLD = float(os.getenv("VAD_ZCR_THRESHOLD", 0.25))
+VAD_ZCR_ENERGY_MARGIN_DB = float(os.getenv("VAD_ZCR_ENERGY_MARGIN_DB", 10))
+# Silence that ends an utterance; this is the end-of-utterance latency.
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", 400))
+# Silence kept on either side of the detected speech.
+VAD_PADDING_MS = int(os.getenv("VAD_PADDING_MS", 120))
+# Utterances with less voiced audio than this are dropped as clicks/noise.
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", 150))
+# Longer utterances are cut and emitted at this length.
+VAD_MAX_UTTERANCE_SECONDS = float(os.getenv("VAD_MAX_UTTERANCE_SECONDS", 20))
+
+
+def frame_features(frames: np.ndarray):
+    """Per-frame energy (dBFS) and zero-crossing rate for an (n, frame_len) int16 array."""
+    samples = frames.astype(np.float32) / 32768.0
+    energy = np.mean(samples ** 2, axis=1)
+    energy_db = 10.0 * np.log10(energy + 1e-10)
+    signs = np.signbit(samples)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return energy_db, zcr
+
+
+class VoiceActivityDetector:
+    """
+    Energy / zero-crossing-rate voice activity detector for 16-bit mono PCM.
+
+    Audio is written into a fixed-size ring buffer and classified a frame at a
+    time (features are computed for all complete frames of a chunk at once).
+    feed() returns the utterances that chunk completed, with leading and
+    trailing silence trimmed to `padding_ms`; only these need to be sent to
+    speech-to-text. An utterance ends after `hangover_ms` of silence.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = VAD_SAMPLE_RATE,
+        frame_ms: int = VAD_FRAME_MS,
+        energy_threshold_db: float = VAD_ENERGY_THRESHOLD_DB,
+        zcr_threshold: float = VAD_ZCR_THRESHOLD,
+        zcr_energy_margin_db: float = VAD_ZCR_ENERGY_MARGIN_DB,
+        hangover_ms: int = VAD_HANGOVER_MS,
+        padding_ms: int = VAD_PADDING_MS,
+        min_speech_ms: int = VAD_MIN_SPEECH_MS,
+        max_utterance_seconds: float = VAD_MAX_UTTERANCE_SECONDS,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, sample_rate * frame_ms // 1000)
+        self.energy_threshold_db = energy_threshold_db
+        self.zcr_threshold = zcr_threshold
+        self.zcr_energy_margin_db = zcr_energy_margin_db
+        self.hangover = sample_rate * hangover_ms // 1000
+        self.padding = sample_rate * padding_ms // 1000
+        self.min_speech = sample_rate * min_speech_ms // 1000
+        self.max_utterance = int(sample_rate * max_utterance_seconds)
+        # Samples written per classification pass; larger chunks are split.
+        self._step = max(self.frame_length, min(self.max_utterance, sample_rate))
+        # Room for the longest utterance, its padding and one unclassified step.
+        self._capacity = self.max_utterance + 2 * self.padding + self.hangover + self._step + 2 * self.frame_length
+        self._ring = np.zeros(self._capacity, dtype=np.int16)
+        self._carry = b""
+        # Absolute sample positions
+        self._written = 0
+        self._classified = 0
+        self._start: Optional[int] = None
+        self._last_voiced_end = 0
+        self._previous_end = 0
+        self._voiced = 0
+        # Counters
+        self.frames = 0
+        self.speech_frames = 0
+        self.utterances = 0
+        self.dropped = 0
+        self.samples_in = 0
+        self.samples_out = 0
+
+    def _write(self, samples: np.ndarray):
+        position = self._written % self._capacity
+        first = min(len(samples), self._capacity - position)
+        self._ring[position:position + first] = samples[:first]
+        self._ring[:len(samples) - first] = samples[first:]
+        self._written += len(samples)
+
+    def _read(self, start: int, end: int) -> bytes:
+        start = max(start, self._written - self._capacity)
+        indices = np.arange(start, end) % self._capacity
+        return self._ring[indices].tobytes()
+
+    def is_speech(self, frames: np.ndarray) -> np.ndarray:
+        energy_db, zcr = frame_features(frames)
+        loud = energy_db >= self.energy_threshold_db
+        fricative = (energy_db >= self.energy_threshold_db - self.zcr_energy_margin_db) & (zcr >= self.zcr_threshold)
+        return loud | fricative
+
+    def feed(self, pcm: bytes) -> List[bytes]:
+        """Adds a chunk of PCM and returns any utterances it completed."""
+        data = self._carry + pcm
+        usable = len(data) - len(data) % 2
+        self._carry = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype="<i2")
+        # Large chunks are written in pieces so the ring never overruns
+        # audio that is still needed.
+        utterances = []
+        for offset in range(0, len(samples), self._step):
+            piece = samples[offset:offset + self._step]
+            self._write(piece)
+            self.samples_in += len(piece)
+            utterances.extend(self._classify())
+        return utterances
+
+    def _classify(self) -> List[bytes]:
+        count = (self._written - self._classified) // self.frame_length
+        if count == 0:
+            return []
+        end = self._classified + count * self.frame_length
+        frames = np.frombuffer(self._read(self._classified, end), dtype=np.int16).reshape(count, self.frame_length)
+        decisions = self.is_speech(frames)
+        self.frames += count
+        self.speech_frames += int(decisions.sum())
+
+        utterances = []
+        for speech in decisions:
+            frame_start = self._classified
+            frame_end = frame_start + self.frame_length
+            self._classified = frame_end
+            if speech:
+                if self._start is None:
+                    # Leading padding never reaches back into the previous utterance.
+                    self._start = max(self._previous_end, frame_start - self.padding)
+                    self._voiced = 0
+                self._voiced += self.frame_length
+                self._last_voiced_end = frame_end
+            if self._start is None:
+                continue
+            if not speech and frame_end - self._last_voiced_end >= self.hangover:
+                utterance = self._finish(min(self._last_voiced_end + self.padding, frame_end))
+            elif frame_end - self._start >= self.max_utterance:
+                utterance = self._finish(frame_end)
+            else:
+                continue
+            if utterance:
+                utterances.append(utterance)
+        return utterances
+
+    def _finish(self, end: int) -> Optional[bytes]:
+        start, voiced = self._start, self._voiced
+        self._start = None
+        self._voiced = 0
+        self._previous_end = end
+        if voiced < self.min_speech:
+            self.dropped += 1
+            return None
+        utterance = self._read(start, end)
+        self.utterances += 1
+        self.samples_out += len(utterance) // 2
+        return utterance
+
+    def flush(self) -> Optional[bytes]:
+        """Ends the current utterance, if any (e.g. when the stream closes)."""
+        if self._start is None:
+            return None
+        return self._finish(min(self._last_voiced_end + self.padding, self._classified))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "frames": self.frames,
+            "speech_frames": self.speech_frames,
+            "utterances": self.utterances,
+            "dropped": self.dropped,
+            "seconds_in": round(self.samples_in / self.sample_rate, 3),
+            "seconds_out": round(self.samples_out / self.sample_rate, 3),
+            "trimmed_ratio": round(1 - self.samples_out / self.samples_in, 3) if self.samples_in else 0.0
+        }